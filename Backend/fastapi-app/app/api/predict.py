@@ -5,7 +5,8 @@ from io import BytesIO
 import os
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Import project functions
@@ -15,7 +16,14 @@ try:
 except ModuleNotFoundError:
     from ..services.model_registry_stub import get_current_version
 
-from ..services.hf_space_service import HFSpaceService
+from ..services.bulk_predict_service import (
+    BULK_BATCH_SIZE,
+    BulkJob,
+    iter_items,
+    iter_spooled,
+    spool_body,
+)
+from ..services.hf_space_service import ENABLE_HF_SPACE, HFSpaceService
 
 router = APIRouter()
 
@@ -63,8 +71,11 @@ async def predict(
         raise HTTPException(status_code=500, detail=f"Model error: {e}")
 
     if not result.get("success"):
+        # Antrean inference lokal penuh: minta client mencoba lagi
+        status_code = 503 if result.get("busy") else 500
         raise HTTPException(
-            status_code=500, detail=result.get("error", "Unknown prediction error")
+            status_code=status_code,
+            detail=result.get("error", "Unknown prediction error"),
         )
 
     # Auto-check untuk retrain setelah prediksi
@@ -84,6 +95,7 @@ async def predict_file(
     file: UploadFile = File(..., description="PNG/JPG gambar atau DOCX dokumen"),
     log_feedback: bool = True,
     user_label: Optional[int] = None,
+    long_document: Optional[bool] = None,
 ) -> PredictFileResponse:
     data = await file.read()
     content_type = (file.content_type or "").lower()
@@ -160,19 +172,25 @@ async def predict_file(
     if not text:
         raise HTTPException(status_code=422, detail="Teks tidak terbaca dari file.")
 
-    # Use HF Space (with fallback) for the extracted text
+    # Use HF Space (with fallback) for the extracted text. DOCX/OCR articles
+    # longer than max_length tokens are scored with sliding windows on the
+    # local model; long_document=true/false overrides that choice.
+    if long_document is None:
+        long_document = await HFSpaceService.exceeds_max_length(text)
     try:
         result = await HFSpaceService.predict_with_fallback(
             text,
             user_label=user_label,
             log_feedback=log_feedback,
+            long_document=long_document,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Model error: {e}")
 
     if not result.get("success"):
         raise HTTPException(
-            status_code=500, detail=result.get("error", "Unknown prediction error")
+            status_code=503 if result.get("busy") else 500,
+            detail=result.get("error", "Unknown prediction error"),
         )
 
     # Auto-check untuk retrain setelah prediksi
@@ -187,6 +205,61 @@ async def predict_file(
     )
 
 
+@router.post("/predict/bulk")
+async def predict_bulk(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = None,
+    log_feedback: bool = False,
+    batch_size: int = BULK_BATCH_SIZE,
+    long_document: bool = False,
+) -> StreamingResponse:
+    """
+    Bulk prediction: body NDJSON (satu objek per baris) atau CSV ber-header
+    dengan kolom text (atau title/body), opsional id dan user_label.
+
+    Hasil dikirim sebagai NDJSON per baris input (index, id, prediction,
+    prob_hoax, confidence, model_version atau error), diakhiri satu baris
+    ringkasan {"done": true, ...}. Tanpa model lokal, teks dinilai lewat
+    batch API HF Space (long_document diabaikan).
+
+    Contoh:
+        curl -X POST "http://localhost:8000/predict/bulk?log_feedback=false" \
+             -H "Content-Type: application/x-ndjson" --data-binary @articles.ndjson
+    """
+    use_space = not HFSpaceService.local_model_available()
+    if use_space and not ENABLE_HF_SPACE:
+        raise HTTPException(
+            status_code=503,
+            detail="Bulk prediction requires the local model or HF Space",
+        )
+
+    fmt = (format or "").lower()
+    if not fmt:
+        content_type = request.headers.get("content-type", "").lower()
+        fmt = "csv" if "csv" in content_type else "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format harus ndjson atau csv")
+
+    job = BulkJob(
+        batch_size=batch_size,
+        log_feedback=log_feedback,
+        long_document=long_document and not use_space,
+        use_space=use_space,
+    )
+    # Auto-check untuk retrain setelah job selesai
+    if log_feedback:
+        background_tasks.add_task(_check_and_trigger_retrain)
+
+    # Body dibaca penuh sebelum response dimulai (lihat bulk_predict_service)
+    spool = await spool_body(request.stream())
+    return StreamingResponse(
+        job.stream(iter_items(iter_spooled(spool), fmt)),
+        media_type="application/x-ndjson",
+        background=background_tasks,
+    )
+
+
 def _check_and_trigger_retrain():
     """Background task untuk cek dan trigger retrain jika perlu"""
     try:
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Optional
 
@@ -12,6 +13,7 @@ from fastapi.routing import APIRoute
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 import os
@@ -52,7 +54,27 @@ except (IndexError, ValueError):
     )
     pass
 
-app = FastAPI(title="FakeNews Detection API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown: model download & warm-up, index, shared HTTP client,
+    feedback writer"""
+    from .services.feedback_writer import feedback_writer
+    from .services.http_client import space_client
+
+    ensure_model_available()
+    warm_up_local_model()
+    build_near_duplicate_index()
+    await space_client.open()
+    feedback_writer.start()
+    yield
+    # Drain queued feedback before the executor and client go away
+    await feedback_writer.stop()
+    await space_client.close()
+    shutdown_inference_executor()
+
+
+app = FastAPI(title="FakeNews Detection API", version="0.1.0", lifespan=lifespan)
 
 # ✅ CORS - Allow localhost and production domains
 ALLOWED_ORIGINS = [
@@ -110,59 +132,117 @@ async def root():
 
 @app.get("/health")
 async def health():
+    """Readiness check: 503 sampai warm-up model lokal selesai"""
+    from .services.readiness import readiness
+
     logger.info("Health check endpoint hit")  # ← TAMBAHKAN LOG
+    if not readiness.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", **readiness.get_status()},
+        )
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+async def check_readiness():
+    """Startup stages (model download progress, warm-up) beserta durasinya"""
+    from .services.readiness import readiness
+
+    status = readiness.get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 @app.get("/health/hf-space")
 async def check_hf_space():
     """Health check for HuggingFace Space integration"""
     try:
         from .services.hf_space_service import HFSpaceService
 
-        health = HFSpaceService.check_space_health()
+        from .services.circuit_breaker import space_breaker
+        from .services.http_client import space_client
+        from .services.space_batch_client import space_batch_client
+
+        health = await HFSpaceService.check_space_health()
         return {
             "hf_space_enabled": os.getenv("ENABLE_HF_SPACE", "true"),
             "hf_space_url": os.getenv("HF_SPACE_URL"),
             "health": health,
+            "circuit_breaker": space_breaker.get_stats(),
+            "hedging": HFSpaceService.get_hedge_stats(),
+            "client": space_client.get_stats(),
+            "batch_client": space_batch_client.get_stats(),
         }
     except Exception as e:
         logger.exception(f"HF Space health check failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.on_event("startup")
-def ensure_model_available():
-    """If model files aren't present locally, attempt to download from Hugging Face hub."""
+@app.get("/health/model")
+async def check_local_model():
+    """Resident local model cache stats (load time, hit/miss counters)"""
     try:
-        from huggingface_hub import snapshot_download
-    except Exception:
-        logger.debug("huggingface_hub not installed; skipping HF model download")
-        return
+        from src.modeling.model_manager import get_stats  # type: ignore
+    except ModuleNotFoundError:
+        return {"local_model_available": False}
+    return {"local_model_available": True, **get_stats()}
+
+
+@app.get("/health/inference")
+async def check_inference_pipeline():
+    """Inference pipeline metrics (cache, batching, executor load, feedback writer)"""
+    from .services import near_duplicate_service
+    from .services.feedback_writer import feedback_writer
+    from .services.inference_executor import inference_executor
+    from .services.micro_batcher import micro_batcher
+    from .services.prediction_cache import prediction_cache
+    from .services.single_flight import single_flight
+
+    try:
+        from src.modeling import batching  # type: ignore
+
+        token_batching = batching.get_stats()
+    except ModuleNotFoundError:
+        token_batching = None  # Railway: inference lewat HF Space
 
-    hf_repo = os.environ.get("HF_MODEL_REPO")
-    if not hf_repo:
-        logger.debug("HF_MODEL_REPO not set; skipping HF model download")
-        return
+    return {
+        "prediction_cache": prediction_cache.get_stats(),
+        "single_flight": single_flight.get_stats(),
+        "near_duplicate": near_duplicate_service.get_stats(),
+        "micro_batcher": micro_batcher.get_stats(),
+        "token_batching": token_batching,
+        "executor": inference_executor.get_stats(),
+        "feedback_writer": feedback_writer.get_stats(),
+    }
+
+
+def ensure_model_available():
+    """If model files aren't present locally, download them from Hugging Face hub
+    in the background (HF Space serves predictions meanwhile)."""
+    from .services.model_download import start_background_download
 
     dest_dir = REPO_ROOT / "Model IndoBERT" / "models" / "indobert"
-    if dest_dir.exists() and any(dest_dir.iterdir()):
-        logger.info("Model directory exists locally at %s, skipping download", dest_dir)
-        return
+    start_background_download(dest_dir)
 
-    token = os.environ.get("HF_TOKEN")
-    logger.info("Downloading model snapshot from %s to %s", hf_repo, dest_dir)
-    try:
-        snapshot_download(
-            repo_id=hf_repo,
-            cache_dir=str(REPO_ROOT / ".hf_cache"),
-            local_dir=str(dest_dir),
-            use_auth_token=token,
-        )
-        logger.info("Model snapshot downloaded to %s", dest_dir)
-    except (
-        Exception
-    ) as exc:  # pragma: no cover - surface the error but do not crash the app
-        logger.exception("Failed to download model snapshot from Hugging Face: %s", exc)
-    except Exception as exc:
-        logger.exception("Failed to download model snapshot from Hugging Face: %s", exc)
+
+def warm_up_local_model():
+    """Load the active local model and run dummy batches before reporting ready"""
+    from .services import model_download
+    from .services.readiness import start_warmup
+
+    if model_download.is_downloading():
+        return  # warm-up dijalankan setelah download selesai
+    start_warmup()
+
+
+def build_near_duplicate_index():
+    """Build the near-duplicate verdict index in the background"""
+    from .services import near_duplicate_service
+
+    near_duplicate_service.start_background_build()
+
+
+def shutdown_inference_executor():
+    from .services.inference_executor import inference_executor
+
+    inference_executor.shutdown()
@@ -0,0 +1,342 @@
+"""
+Service untuk bulk prediction (NDJSON/CSV masuk, NDJSON keluar).
+
+Body request di-spool dulu ke SpooledTemporaryFile (memori sampai
+BULK_SPOOL_MAX_MEMORY, selebihnya disk) sebelum response dikirim: selama
+StreamingResponse berjalan, starlette memakai receive() untuk mendeteksi
+disconnect sehingga body tidak bisa lagi dibaca dari dalam generator.
+Spool dibaca per chunk dan di-parse per baris, dikumpulkan menjadi batch
+internal, lalu dinilai dengan predict_indobert di inference executor (atau,
+tanpa model lokal, lewat batch client HF Space). Hasil dikirim balik sebagai
+NDJSON begitu tiap batch selesai. Paling banyak satu batch sedang dinilai
+sementara batch berikutnya dibaca, sehingga memori tetap terbatas berapa pun
+ukuran input. Feedback (log_feedback) diantrekan ke feedback_writer dengan
+backpressure: job menunggu jika antrean penuh, tidak membuang record.
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import IO, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .feedback_writer import feedback_writer
+from .inference_executor import inference_executor
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "64"))
+BULK_MAX_BATCH_SIZE = int(os.getenv("BULK_MAX_BATCH_SIZE", "512"))
+BULK_SPOOL_MAX_MEMORY = int(os.getenv("BULK_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+BULK_READ_CHUNK_SIZE = 64 * 1024
+
+
+# --------------------------
+# Request body spooling
+# --------------------------
+
+
+def _on_disk(spool: IO[bytes]) -> bool:
+    return getattr(spool, "_rolled", True)
+
+
+async def spool_body(chunks: AsyncIterator[bytes]) -> IO[bytes]:
+    """Baca seluruh body request ke SpooledTemporaryFile (posisi di awal)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_MAX_MEMORY)
+    try:
+        async for chunk in chunks:
+            if _on_disk(spool):
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def iter_spooled(spool: IO[bytes]) -> AsyncIterator[bytes]:
+    """Baca spool per chunk; file ditutup setelah habis atau saat dibatalkan"""
+    try:
+        while True:
+            if _on_disk(spool):
+                chunk = await asyncio.to_thread(spool.read, BULK_READ_CHUNK_SIZE)
+            else:
+                chunk = spool.read(BULK_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+# --------------------------
+# Input parsing
+# --------------------------
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Pecah stream bytes menjadi baris teks (UTF-8, BOM diabaikan)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, str]]:
+    """CSV dengan header; field ber-quote boleh memuat baris baru"""
+    header: Optional[List[str]] = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue  # quoted field belum ditutup
+        values = next(csv.reader([record])) if record.strip() else []
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield dict(zip(header, values))
+    if record.strip() and header is not None:
+        yield dict(zip(header, next(csv.reader([record]))))
+
+
+async def _iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield {"_error": f"Invalid JSON: {e}"}
+            continue
+        yield row if isinstance(row, dict) else {"text": str(row)}
+
+
+def _to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Ambil id, teks (text atau title+body) dan user_label dari satu baris"""
+    item: Dict[str, Any] = {"id": row.get("id")}
+    if "_error" in row:
+        item["error"] = row["_error"]
+        return item
+
+    text = str(row.get("text") or "").strip()
+    if not text:
+        title = str(row.get("title") or "").strip()
+        body = str(row.get("body") or "").strip()
+        text = (title + "\n\n" + body).strip()
+    if not text:
+        item["error"] = "Text/title/body is required"
+        return item
+    item["text"] = text
+
+    label = row.get("user_label")
+    if label not in (None, ""):
+        try:
+            label = int(label)
+        except (TypeError, ValueError):
+            label = -1
+        if label not in (0, 1):
+            item["error"] = "user_label must be 0 or 1"
+            return item
+        item["user_label"] = label
+    return item
+
+
+def iter_items(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Dict[str, Any]]:
+    """Parse body request (format "ndjson" atau "csv") menjadi item prediksi"""
+    lines = _iter_lines(chunks)
+    rows = _iter_csv_rows(lines) if fmt == "csv" else _iter_ndjson_rows(lines)
+
+    async def items() -> AsyncIterator[Dict[str, Any]]:
+        async for row in rows:
+            yield _to_item(row)
+
+    return items()
+
+
+# --------------------------
+# Scoring
+# --------------------------
+
+
+def score_batch(
+    texts: List[str],
+    long_document: bool,
+) -> Tuple[List[int], List[float], str]:
+    """Satu panggilan predict_indobert untuk seluruh batch (jalan di executor).
+
+    Feedback tidak ditulis di sini; BulkJob mengantrekannya ke feedback_writer.
+    """
+    from src.modeling.predict import predict_indobert  # type: ignore
+    from src.services.model_registry import get_current_version  # type: ignore
+
+    preds, probs = predict_indobert(
+        texts,
+        return_proba=True,
+        log_feedback=False,
+        long_document=long_document,
+    )  # type: ignore
+    return list(preds), list(probs), get_current_version()
+
+
+class BulkJob:
+    """Satu job bulk: baca item, nilai per batch, hasilkan baris NDJSON"""
+
+    def __init__(
+        self,
+        batch_size: int = BULK_BATCH_SIZE,
+        log_feedback: bool = False,
+        long_document: bool = False,
+        use_space: bool = False,
+    ):
+        self.batch_size = max(1, min(batch_size, BULK_MAX_BATCH_SIZE))
+        self.log_feedback = log_feedback
+        self.long_document = long_document
+        # True: nilai lewat HF Space (model lokal tidak tersedia)
+        self.use_space = use_space
+        self.rows = 0
+        self.errors = 0
+        self.batches = 0
+
+    def _start(self, batch: List[Dict[str, Any]]) -> Optional[asyncio.Task]:
+        valid = [item for item in batch if "error" not in item]
+        if not valid:
+            return None
+        score = self._score_space if self.use_space else self._score_local
+        return asyncio.ensure_future(score(valid))
+
+    async def _score_local(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        preds, probs, version = await inference_executor.run(
+            score_batch, [item["text"] for item in items], self.long_document
+        )
+        scored = []
+        for item, pred, prob in zip(items, preds, probs):
+            prob = float(prob)
+            result = {
+                "prediction": int(pred),
+                "prob_hoax": prob,
+                "confidence": max(prob, 1 - prob),
+                "model_version": version,
+            }
+            if self.log_feedback:
+                await feedback_writer.submit_wait(
+                    item["text"], result, item.get("user_label")
+                )
+            scored.append(result)
+        return scored
+
+    async def _score_space(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Satu panggilan batch client; error Space dipetakan per item"""
+        from .hf_space_service import HFSpaceService
+
+        results = await HFSpaceService.predict_batch_via_space(
+            [item["text"] for item in items]
+        )
+        scored = []
+        for item, result in zip(items, results):
+            if not result["success"]:
+                scored.append({"error": result["error"]})
+                continue
+            if self.log_feedback:
+                await feedback_writer.submit_wait(
+                    item["text"], result, item.get("user_label")
+                )
+            prob = float(result["prob_hoax"])
+            confidence = result.get("confidence")
+            scored.append(
+                {
+                    "prediction": int(result["prediction"]),
+                    "prob_hoax": prob,
+                    "confidence": float(
+                        confidence if confidence is not None else max(prob, 1 - prob)
+                    ),
+                    "model_version": result.get("model_version", "hf_space"),
+                }
+            )
+        return scored
+
+    async def _finish(
+        self, batch: List[Dict[str, Any]], task: Optional[asyncio.Task]
+    ) -> List[str]:
+        results: List[Dict[str, Any]] = []
+        scored: List[Dict[str, Any]] = []
+        failure: Optional[str] = None
+        if task is not None:
+            try:
+                scored = await task
+            except Exception as e:
+                logger.exception(f"Bulk batch failed: {e}")
+                failure = f"Model error: {e}"
+
+        position = 0
+        for item in batch:
+            out: Dict[str, Any] = {"index": item["index"], "id": item.get("id")}
+            if "error" in item:
+                out["error"] = item["error"]
+            elif failure is not None:
+                out["error"] = failure
+            else:
+                out.update(scored[position])
+                position += 1
+            if "error" in out:
+                self.errors += 1
+            results.append(out)
+        self.batches += 1
+        return [json.dumps(r, ensure_ascii=False) + "\n" for r in results]
+
+    async def stream(self, items: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Hasilkan baris NDJSON sesuai urutan input, diakhiri baris ringkasan"""
+        started = time.perf_counter()
+        batch: List[Dict[str, Any]] = []
+        pending: Optional[Tuple[List[Dict[str, Any]], Optional[asyncio.Task]]] = None
+        try:
+            async for item in items:
+                item["index"] = self.rows
+                self.rows += 1
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+                # Batch berikutnya dibaca selagi batch sebelumnya dinilai
+                if pending is not None:
+                    for line in await self._finish(*pending):
+                        yield line
+                pending = (batch, self._start(batch))
+                batch = []
+
+            if pending is not None:
+                for line in await self._finish(*pending):
+                    yield line
+                pending = None
+            if batch:
+                for line in await self._finish(batch, self._start(batch)):
+                    yield line
+        finally:
+            # Client disconnect: jangan biarkan batch yatim tetap berjalan
+            if pending is not None and pending[1] is not None:
+                pending[1].cancel()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "done": True,
+            "rows": self.rows,
+            "errors": self.errors,
+            "batches": self.batches,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 2) if elapsed > 0 else None,
+        }
+        logger.info(f"Bulk prediction finished: {summary}")
+        yield json.dumps(summary) + "\n"
@@ -0,0 +1,188 @@
+"""
+Circuit breaker untuk panggilan ke HF Space.
+
+Saat Space tidur/overload, setiap request menunggu HF_SPACE_TIMEOUT penuh
+sebelum fallback ke model lokal. Breaker melacak hasil dan latensi panggilan
+terakhir (rolling window):
+
+- closed: semua request ke Space. Breaker open jika gagal berturut-turut
+  >= CB_FAILURE_THRESHOLD, atau failure rate di window >= CB_FAILURE_RATE.
+  Panggilan yang lebih lambat dari CB_SLOW_CALL_SECONDS dihitung gagal.
+- open: request langsung ke model lokal selama CB_OPEN_SECONDS.
+- half_open: sejumlah kecil request probe dikirim ke Space; sukses -> closed,
+  gagal -> open lagi.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Breaker configuration
+CB_FAILURE_THRESHOLD = int(os.getenv("CB_FAILURE_THRESHOLD", "5"))
+CB_FAILURE_RATE = float(os.getenv("CB_FAILURE_RATE", "0.5"))
+CB_WINDOW_SIZE = int(os.getenv("CB_WINDOW_SIZE", "20"))
+CB_MIN_CALLS = int(os.getenv("CB_MIN_CALLS", "10"))
+CB_OPEN_SECONDS = float(os.getenv("CB_OPEN_SECONDS", "30"))
+CB_HALF_OPEN_PROBES = int(os.getenv("CB_HALF_OPEN_PROBES", "1"))
+CB_SLOW_CALL_SECONDS = float(os.getenv("CB_SLOW_CALL_SECONDS", "10"))
+CB_LATENCY_SAMPLES = int(os.getenv("CB_LATENCY_SAMPLES", "200"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker dengan pencatatan latensi"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CB_FAILURE_THRESHOLD,
+        failure_rate: float = CB_FAILURE_RATE,
+        window_size: int = CB_WINDOW_SIZE,
+        min_calls: int = CB_MIN_CALLS,
+        open_seconds: float = CB_OPEN_SECONDS,
+        half_open_probes: int = CB_HALF_OPEN_PROBES,
+        slow_call_seconds: float = CB_SLOW_CALL_SECONDS,
+        latency_samples: int = CB_LATENCY_SAMPLES,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.slow_call_seconds = slow_call_seconds
+
+        self.state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+        self._probe_started = 0.0
+        self._consecutive_failures = 0
+        # (ok, latency) per panggilan terakhir; latensi dari panggilan sukses
+        # (plus batas bawah panggilan hedged yang dibatalkan)
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=max(1, window_size))
+        self._latencies: Deque[float] = deque(maxlen=max(1, latency_samples))
+        self._stats: Dict[str, Any] = {
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0,
+            "censored_samples": 0,
+        }
+
+    # --------------------------
+    # State transitions
+    # --------------------------
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._stats["opened"] += 1
+        if state == CLOSED:
+            self._window.clear()
+            self._consecutive_failures = 0
+        self._probes_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """True jika request boleh dikirim (probe dihitung saat half-open)"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self._stats["rejected"] += 1
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            # Probe yang dibatalkan tidak pernah melapor; jangan tertahan selamanya
+            if time.monotonic() - self._probe_started > self.open_seconds:
+                self._probes_in_flight = 0
+            if self._probes_in_flight >= self.half_open_probes:
+                self._stats["rejected"] += 1
+                return False
+            self._probes_in_flight += 1
+            self._probe_started = time.monotonic()
+        return True
+
+    def record_success(self, latency: float, sample: bool = True) -> None:
+        """sample=False: hitung untuk state breaker saja, bukan persentil latensi"""
+        if sample:
+            self._latencies.append(latency)
+        if latency > self.slow_call_seconds:
+            self._stats["slow_calls"] += 1
+            self.record_failure(latency)
+            return
+        self._stats["successes"] += 1
+        self._window.append((True, latency))
+        self._consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_latency_sample(self, latency: float) -> None:
+        """Latensi panggilan yang dibatalkan (batas bawah): hanya untuk persentil"""
+        self._latencies.append(latency)
+        self._stats["censored_samples"] += 1
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        self._stats["failures"] += 1
+        self._window.append((False, latency or 0.0))
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._transition(OPEN)
+        elif self.state == CLOSED and self._should_trip():
+            self._transition(OPEN)
+        elif self.state == OPEN:
+            self._opened_at = time.monotonic()  # masih gagal: perpanjang
+
+    def _should_trip(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._window) < self.min_calls:
+            return False
+        failures = sum(1 for ok, _ in self._window if not ok)
+        return failures / len(self._window) >= self.failure_rate
+
+    # --------------------------
+    # Metrics
+    # --------------------------
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Persentil (0-100) latensi sukses terakhir, dalam detik"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        idx = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["state"] = self.state
+        stats["consecutive_failures"] = self._consecutive_failures
+        window = list(self._window)
+        stats["window_calls"] = len(window)
+        stats["window_failure_rate"] = (
+            sum(1 for ok, _ in window if not ok) / len(window) if window else 0.0
+        )
+        if self.state == OPEN:
+            stats["retry_in_seconds"] = round(
+                max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1
+            )
+        latency_ms: Dict[str, Optional[float]] = {}
+        for q in (50, 90, 95, 99):
+            value = self.latency_percentile(q)
+            latency_ms[f"p{q}"] = round(value * 1000.0, 1) if value is not None else None
+        stats["latency_ms"] = latency_ms
+        stats["latency_samples"] = len(self._latencies)
+        return stats
+
+
+# Singleton instance untuk HF Space
+space_breaker = CircuitBreaker("hf_space")
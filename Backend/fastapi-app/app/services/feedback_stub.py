@@ -6,7 +6,7 @@ File ini menyediakan stub functions untuk menghindari ModuleNotFoundError.
 """
 
 import logging
-from typing import Optional, Iterator, Dict, Any
+from typing import Optional, Iterator, Dict, Any, Iterable, List
 from pathlib import Path
 import json
 import os
@@ -64,6 +64,51 @@ def update_user_label(
         return False
 
 
+def log_prediction(
+    texts: Iterable[str],
+    predictions: Iterable[int],
+    probs_hoax: Iterable[float],
+    confidences: Iterable[float],
+    model_name: str,
+    model_version: str = "v1",
+    user_labels: Optional[Iterable[Optional[int]]] = None,
+) -> List[bool]:
+    """
+    Log banyak hasil prediksi sekaligus (satu kali buka file).
+
+    Di Railway, ini akan save ke /tmp (ephemeral storage).
+
+    Returns:
+        List True per baris yang ditulis
+    """
+    texts = list(texts)
+    if user_labels is None:
+        user_labels = [None] * len(texts)
+
+    feedback_file = FEEDBACK_DIR / "feedback.jsonl"
+    lines = []
+    for text, prediction, prob_hoax, confidence, user_label in zip(
+        texts, predictions, probs_hoax, confidences, user_labels
+    ):
+        feedback_entry = {
+            "text": text,
+            "prediction": int(prediction),
+            "user_label": user_label,
+            "prob_hoax": float(prob_hoax),
+            "metadata": {
+                "confidence": float(confidence),
+                "model_name": model_name,
+                "model_version": model_version,
+            },
+        }
+        lines.append(json.dumps(feedback_entry, ensure_ascii=False) + "\n")
+
+    with open(feedback_file, "a", encoding="utf-8") as f:
+        f.writelines(lines)
+
+    return [True] * len(lines)
+
+
 def iter_feedback(
     limit: Optional[int] = None, only_unlabeled: bool = False
 ) -> Iterator[Dict[str, Any]]:
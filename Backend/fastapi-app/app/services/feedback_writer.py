@@ -0,0 +1,293 @@
+"""
+Background writer untuk feedback prediksi (CSV retrain + PostgreSQL).
+
+Request hanya memasukkan record ke antrean in-memory; satu writer task
+mengambil record per batch dan menulisnya di thread terpisah: satu
+feedback.log_prediction per (model_name, model_version) untuk CSV dan satu
+session add_all + commit untuk database (group commit). Batch di-flush saat
+berisi FEEDBACK_FLUSH_SIZE record atau FEEDBACK_FLUSH_INTERVAL_MS sejak record
+pertama, mana yang lebih dulu. Saat shutdown antrean dikosongkan sebelum
+proses berhenti.
+
+Request tunggal memakai submit(): jika antrean penuh record dibuang (dicatat
+di stats "dropped") agar request tidak tertahan. Job bulk yang meminta
+log_feedback memakai submit_wait() yang menunggu ruang di antrean
+(backpressure), sehingga tidak ada record yang hilang.
+
+Selama drain saat shutdown record baru tetap masuk antrean. Tanpa writer yang
+berjalan, record ditulis di thread (di dalam event loop) atau langsung secara
+sinkron (mis. dipanggil dari script).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Writer configuration
+ENABLE_FEEDBACK_WRITER = os.getenv("ENABLE_FEEDBACK_WRITER", "true").lower() == "true"
+FEEDBACK_FLUSH_SIZE = int(os.getenv("FEEDBACK_FLUSH_SIZE", "100"))
+FEEDBACK_FLUSH_INTERVAL_MS = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_MS", "500"))
+FEEDBACK_QUEUE_MAX = int(os.getenv("FEEDBACK_QUEUE_MAX", "10000"))
+FEEDBACK_DRAIN_TIMEOUT = float(os.getenv("FEEDBACK_DRAIN_TIMEOUT", "10"))
+
+_STOP = object()
+
+
+def _model_name(result: Dict[str, Any]) -> str:
+    """Verdict salinan (near-duplicate/cache) dicatat terpisah dari inference"""
+    if result.get("source") == "near_duplicate":
+        return "near_duplicate"
+    if result.get("cached"):
+        return "cache"
+    return result.get("model_name", "indobert")
+
+
+def make_record(
+    text: str, result: Dict[str, Any], user_label: Optional[int] = None
+) -> Dict[str, Any]:
+    """Record feedback dari hasil prediksi sukses"""
+    prediction = int(result["prediction"])
+    prob_hoax = float(result["prob_hoax"])
+    return {
+        "timestamp": int(time.time()),
+        "text": text,
+        "prediction": prediction,
+        "prob_hoax": prob_hoax,
+        "confidence": float(result.get("confidence", prob_hoax)),
+        "model_name": _model_name(result),
+        "model_version": result.get("model_version", "hf_space"),
+        "user_label": user_label,
+    }
+
+
+def _write_csv(records: List[Dict[str, Any]]) -> None:
+    """Satu log_prediction (satu kali buka file) per model_name/model_version"""
+    # Use stub in Railway production
+    try:
+        from src.feedback import log_prediction  # type: ignore
+    except ModuleNotFoundError:
+        from .feedback_stub import log_prediction
+
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault((record["model_name"], record["model_version"]), []).append(
+            record
+        )
+    for (model_name, model_version), group in groups.items():
+        log_prediction(
+            [r["text"] for r in group],
+            [r["prediction"] for r in group],
+            [r["prob_hoax"] for r in group],
+            [r["confidence"] for r in group],
+            model_name=model_name,
+            model_version=model_version,
+            user_labels=[r["user_label"] for r in group],
+        )
+
+
+def _write_db(records: List[Dict[str, Any]]) -> None:
+    """Semua record dalam satu transaksi (add_all + satu commit)"""
+    from ..database import get_db
+    from ..models import Feedback
+
+    db = next(get_db())
+    try:
+        db.add_all(
+            [
+                Feedback(
+                    timestamp=r["timestamp"],
+                    model_name=r["model_name"],
+                    model_version=r["model_version"],
+                    text_length=len(r["text"]),
+                    prediction=r["prediction"],
+                    prob_hoax=r["prob_hoax"],
+                    confidence=r["confidence"],
+                    user_label=r["user_label"],
+                    agreement="unknown"
+                    if r["user_label"] is None
+                    else ("yes" if r["user_label"] == r["prediction"] else "no"),
+                    raw_text=r["text"],
+                )
+                for r in records
+            ]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class FeedbackWriter:
+    """Antrean feedback + satu writer task dengan group commit"""
+
+    def __init__(
+        self,
+        flush_size: int = FEEDBACK_FLUSH_SIZE,
+        flush_interval_ms: float = FEEDBACK_FLUSH_INTERVAL_MS,
+        queue_max: int = FEEDBACK_QUEUE_MAX,
+    ):
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.queue_max = max(0, queue_max)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Any] = {
+            "enqueued": 0,
+            "written": 0,
+            "sync_writes": 0,
+            "dropped": 0,
+            "backpressure_waits": 0,
+            "flushes": 0,
+            "csv_errors": 0,
+            "db_errors": 0,
+            "max_batch_size_seen": 0,
+            "last_flush_seconds": 0.0,
+        }
+
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Mulai writer task di event loop yang sedang berjalan (lifespan)"""
+        if not ENABLE_FEEDBACK_WRITER or self.running():
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_max)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"Feedback writer started (flush_size={self.flush_size}, "
+            f"interval={self.flush_interval * 1000:.0f}ms)"
+        )
+
+    async def stop(self, timeout: float = FEEDBACK_DRAIN_TIMEOUT) -> None:
+        """Tulis semua record yang masih antre, lalu hentikan writer
+
+        Record yang masuk selama drain tetap diantrekan dan ikut ditulis;
+        writer baru berhenti setelah antrean kosong.
+        """
+        if not self.running():
+            return
+        task, queue = self._task, self._queue
+        pending = queue.qsize()
+
+        async def drain() -> None:
+            await queue.put(_STOP)
+            await task
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+            logger.info(f"Feedback writer drained {pending} queued records")
+        except asyncio.TimeoutError:
+            logger.error(
+                f"Feedback writer drain timed out; {queue.qsize()} records not written"
+            )
+        finally:
+            self._task = None  # record baru setelah ini ditulis di thread
+
+    def submit(
+        self, text: str, result: Dict[str, Any], user_label: Optional[int] = None
+    ) -> None:
+        """Antrekan satu record tanpa menunggu disk/DB"""
+        record = make_record(text, result, user_label)
+        if not self.running():
+            self._write_outside_loop(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+            self._stats["enqueued"] += 1
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            logger.warning("Feedback queue full, dropping feedback record")
+
+    def _write_outside_loop(self, record: Dict[str, Any]) -> None:
+        """Tanpa writer: tulis di thread jika ada event loop, selain itu sinkron"""
+        self._stats["sync_writes"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write([record])  # script / tanpa event loop
+            return
+        loop.run_in_executor(None, self._write, [record])
+
+    async def submit_wait(
+        self, text: str, result: Dict[str, Any], user_label: Optional[int] = None
+    ) -> None:
+        """Seperti submit(), tetapi menunggu ruang di antrean alih-alih membuang"""
+        record = make_record(text, result, user_label)
+        if not self.running():
+            self._stats["sync_writes"] += 1
+            await asyncio.to_thread(self._write, [record])
+            return
+        if self._queue.full():
+            self._stats["backpressure_waits"] += 1
+        await self._queue.put(record)
+        self._stats["enqueued"] += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        stopping = False
+        # Setelah _STOP: terus tulis sampai antrean kosong (drain)
+        while not (stopping and queue.empty()):
+            first = await queue.get()
+            if first is _STOP:
+                stopping = True
+                continue
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                timeout = deadline - loop.time()
+                try:
+                    item = (
+                        queue.get_nowait()
+                        if timeout <= 0 or stopping
+                        else await asyncio.wait_for(queue.get(), timeout)
+                    )
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    continue
+                batch.append(item)
+            # Disk & DB I/O di thread; event loop tetap melayani request
+            await loop.run_in_executor(None, self._write, batch)
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            _write_csv(records)
+        except Exception as e:
+            self._stats["csv_errors"] += 1
+            logger.warning(f"Failed to log {len(records)} feedback rows to CSV: {e}")
+        try:
+            _write_db(records)
+        except Exception as e:
+            self._stats["db_errors"] += 1
+            logger.warning(
+                f"Failed to log {len(records)} feedback rows to PostgreSQL: {e}"
+            )
+        self._stats["flushes"] += 1
+        self._stats["written"] += len(records)
+        self._stats["max_batch_size_seen"] = max(
+            self._stats["max_batch_size_seen"], len(records)
+        )
+        self._stats["last_flush_seconds"] = round(time.perf_counter() - started, 4)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["enabled"] = ENABLE_FEEDBACK_WRITER
+        stats["running"] = self.running()
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        stats["avg_batch_size"] = (
+            stats["written"] / stats["flushes"] if stats["flushes"] else 0.0
+        )
+        return stats
+
+
+# Singleton instance
+feedback_writer = FeedbackWriter()
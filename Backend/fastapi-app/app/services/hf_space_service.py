@@ -3,18 +3,47 @@ Service untuk integrasi dengan HuggingFace Space
 Handles prediction requests to HF Space dengan fallback ke local model
 """
 
+import asyncio
+import functools
 import httpx
 import os
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
+
+from .circuit_breaker import space_breaker
+from .feedback_writer import feedback_writer
+from .http_client import HF_SPACE_URL, REQUEST_TIMEOUT, space_client
+from .inference_executor import InferenceBusyError, inference_executor
+from .micro_batcher import ENABLE_MICRO_BATCHING, micro_batcher, run_local_batch
+from . import near_duplicate_service
+from .prediction_cache import ENABLE_PREDICTION_CACHE, prediction_cache
+from .single_flight import ENABLE_SINGLE_FLIGHT, single_flight
+from .space_batch_client import parse_space_prediction, space_batch_client
 
 logger = logging.getLogger(__name__)
 
-# HF Space configuration
-HF_SPACE_URL = os.getenv("HF_SPACE_URL", "https://davidbio-fakenewsdetection.hf.space")
-HF_SPACE_API_KEY = os.getenv("HF_SPACE_API_KEY", "")  # Optional, jika Space private
+# HF Space configuration (URL, API key, timeout & pool: lihat http_client.py)
 ENABLE_HF_SPACE = os.getenv("ENABLE_HF_SPACE", "true").lower() == "true"
-REQUEST_TIMEOUT = float(os.getenv("HF_SPACE_TIMEOUT", "30.0"))
+# Max sliding windows per long document (bounds /predict-file latency)
+LONG_DOC_MAX_WINDOWS = int(os.getenv("LONG_DOC_MAX_WINDOWS", "8"))
+
+# Hedged requests: jika Space belum menjawab setelah persentil latensinya,
+# model lokal ikut dijalankan dan hasil tercepat yang dipakai
+ENABLE_HEDGING = os.getenv("ENABLE_HEDGING", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY_MS = float(os.getenv("HEDGE_DEFAULT_DELAY_MS", "2000"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "100"))
+
+_hedge_stats: Dict[str, Any] = {
+    "requests": 0,
+    "hedges_fired": 0,
+    "space_before_delay": 0,
+    "space_wins": 0,
+    "local_wins": 0,
+    "both_failed": 0,
+}
 
 
 class HFSpaceService:
@@ -25,52 +54,44 @@ class HFSpaceService:
         """
         Kirim request prediksi ke HF Space API
 
+        Hasil dan latensi dicatat di circuit breaker (space_breaker).
+
         Args:
             text: Teks berita yang akan diprediksi
 
         Returns:
             Dictionary dengan hasil prediksi
         """
+        started = time.perf_counter()
         try:
             logger.info(f"Sending prediction request to HF Space: {HF_SPACE_URL}")
 
-            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-                # Call FastAPI endpoint di HF Space
-                response = await client.post(
-                    f"{HF_SPACE_URL}/api/predict",
-                    json={"text": text},
-                    headers=(
-                        {"Authorization": f"Bearer {HF_SPACE_API_KEY}"}
-                        if HF_SPACE_API_KEY
-                        else {}
-                    ),
-                )
+            # Shared pooled client: koneksi ke Space dipakai ulang (keep-alive)
+            response = await space_client.get().post(
+                "/api/predict", json={"text": text}
+            )
+            elapsed = time.perf_counter() - started
 
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(
-                        f"HF Space prediction success: {result.get('prediction')}"
-                    )
-                    return {
-                        "success": True,
-                        "prediction": result.get("prediction"),
-                        "prob_hoax": result.get("prob_hoax"),
-                        "confidence": result.get("confidence"),
-                        "probabilities": result.get("probabilities", {}),
-                        "model_version": result.get("model_version", "hf_space"),
-                        "source": "hf_space",
-                    }
-                else:
-                    logger.error(
-                        f"HF Space API error: {response.status_code} - {response.text}"
-                    )
-                    return {
-                        "success": False,
-                        "error": f"API returned {response.status_code}: {response.text}",
-                        "source": "hf_space",
-                    }
+            if response.status_code == 200:
+                space_breaker.record_success(elapsed)
+                result = response.json()
+                logger.info(f"HF Space prediction success: {result.get('prediction')}")
+                return parse_space_prediction(result)
+            else:
+                # 5xx/429 = Space bermasalah; 4xx lain adalah kesalahan input
+                if response.status_code >= 500 or response.status_code == 429:
+                    space_breaker.record_failure(elapsed)
+                logger.error(
+                    f"HF Space API error: {response.status_code} - {response.text}"
+                )
+                return {
+                    "success": False,
+                    "error": f"API returned {response.status_code}: {response.text}",
+                    "source": "hf_space",
+                }
 
         except httpx.TimeoutException:
+            space_breaker.record_failure(time.perf_counter() - started)
             logger.error(f"HF Space API timeout after {REQUEST_TIMEOUT}s")
             return {
                 "success": False,
@@ -78,94 +99,199 @@ class HFSpaceService:
                 "source": "hf_space",
             }
         except Exception as e:
+            space_breaker.record_failure(time.perf_counter() - started)
             logger.exception(f"Error calling HF Space API: {e}")
             return {"success": False, "error": str(e), "source": "hf_space"}
 
+    @staticmethod
+    async def predict_batch_via_space(texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Kirim banyak teks ke HF Space (lihat space_batch_client.py)
+
+        Teks dikirim per chunk ke /api/predict/batch jika Space mendukungnya,
+        selain itu satu request per teks. Tanpa cache dan tanpa logging.
+
+        Args:
+            texts: List teks berita
+
+        Returns:
+            List hasil sejajar dengan texts; item gagal berisi success=False
+        """
+        return await space_batch_client.predict_batch(texts)
+
     @staticmethod
     async def predict_with_fallback(
-        text: str, user_label: Optional[int] = None, log_feedback: bool = True
+        text: str,
+        user_label: Optional[int] = None,
+        log_feedback: bool = True,
+        long_document: bool = False,
     ) -> Dict[str, Any]:
         """
         Prediksi dengan fallback ke local model jika HF Space gagal
 
+        Hasil sukses disimpan di prediction cache; teks yang sama (setelah
+        normalisasi) dijawab dari cache tanpa memanggil HF Space/model lokal.
+        Teks yang hampir sama (near-duplicate) memakai verdict yang sudah ada.
+        Request identik yang datang bersamaan menunggu satu prediksi bersama
+        (single-flight), masing-masing tetap mencatat feedback sendiri.
+
         Args:
             text: Teks berita
             user_label: Label dari user (optional)
             log_feedback: Apakah feedback di-log untuk retrain
+            long_document: Nilai seluruh teks dengan sliding window di model
+                lokal (jika tersedia) alih-alih memotong di 256 token
 
         Returns:
             Dictionary hasil prediksi
         """
-        # Try HF Space first (jika enabled)
-        if ENABLE_HF_SPACE:
-            result = await HFSpaceService.predict_via_space(text)
+        # Sliding-window scoring only exists on the local model
+        long_document = long_document and HFSpaceService.local_model_available()
 
-            if result["success"]:
-                # Log feedback ke local CSV dan PostgreSQL database
+        cache_key = None
+        if ENABLE_PREDICTION_CACHE or ENABLE_SINGLE_FLIGHT:
+            cache_key = prediction_cache.key_for(
+                text, variant="long" if long_document else ""
+            )
+        if ENABLE_PREDICTION_CACHE:
+            cached = await prediction_cache.get(cache_key)
+            if cached is not None:
+                cached["cached"] = True
                 if log_feedback:
-                    try:
-                        # 1. Log ke CSV untuk retrain (Railway: use stub)
-                        try:
-                            from src.modeling.predict import (
-                                predict_indobert,
-                            )  # type: ignore
-                        except ModuleNotFoundError:
-                            from .predict_stub import predict_indobert
-
-                        predict_indobert(
-                            [text],
-                            return_proba=False,
-                            log_feedback=True,
-                            user_labels=[user_label]
-                            if user_label is not None
-                            else None,
-                        )
-                        logger.debug("Feedback logged to CSV for future retrain")
-                    except Exception as e:
-                        logger.warning(f"Failed to log feedback to CSV: {e}")
-
-                    # 2. Log ke PostgreSQL database
-                    try:
-                        from ..database import get_db
-                        from ..models import Feedback
-                        import time
-
-                        db = next(get_db())
-                        feedback_entry = Feedback(
-                            timestamp=int(time.time()),  # Epoch timestamp as integer
-                            model_name="indobert",
-                            model_version=result.get("model_version", "hf_space"),
-                            text_length=len(text),
-                            prediction=int(result["prediction"]),
-                            prob_hoax=float(result["prob_hoax"]),
-                            confidence=float(
-                                result.get("confidence", result["prob_hoax"])
-                            ),
-                            user_label=user_label,
-                            agreement="unknown"
-                            if user_label is None
-                            else (
-                                "yes" if user_label == result["prediction"] else "no"
-                            ),
-                            raw_text=text,
-                        )
-                        db.add(feedback_entry)
-                        db.commit()
-                        logger.debug(
-                            f"Feedback logged to PostgreSQL (id={feedback_entry.id})"
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to log feedback to PostgreSQL: {e}")
+                    HFSpaceService.log_feedback(text, cached, user_label)
+                return cached
+
+        if ENABLE_SINGLE_FLIGHT:
+            result = await single_flight.run(
+                cache_key,
+                lambda: HFSpaceService._predict_and_cache(
+                    text, long_document, cache_key
+                ),
+            )
+        else:
+            result = await HFSpaceService._predict_and_cache(
+                text, long_document, cache_key
+            )
+
+        if result["success"] and log_feedback:
+            HFSpaceService.log_feedback(text, result, user_label)
+        return result
+
+    @staticmethod
+    async def _predict_and_cache(
+        text: str, long_document: bool, cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        """Near-duplicate, lalu Space/model lokal; hasil sukses masuk cache"""
+        # Lightly edited copies of already-scored texts reuse that verdict.
+        # Shingling/MinHash and the registry read stay off the event loop.
+        result = await asyncio.to_thread(near_duplicate_service.lookup, text)
+        if result is None:
+            if long_document:
+                result = await HFSpaceService._predict_local_uncached(
+                    text, long_document=True
+                )
+            if result is None or not result["success"]:
+                result = await HFSpaceService._predict_uncached(text)
+
+        if result["success"] and ENABLE_PREDICTION_CACHE and cache_key is not None:
+            prediction_cache.put(cache_key, result)
+        return result
 
+    @staticmethod
+    async def _predict_uncached(text: str) -> Dict[str, Any]:
+        """HF Space (jika enabled) lalu fallback ke model lokal, tanpa logging
+
+        Saat circuit breaker open, request langsung ke model lokal tanpa
+        menunggu timeout Space (kecuali model lokal tidak tersedia).
+        """
+        # Try HF Space first (jika enabled dan breaker mengizinkan)
+        if ENABLE_HF_SPACE and (
+            space_breaker.allow_request()
+            or not HFSpaceService.local_model_available()
+        ):
+            if ENABLE_HEDGING and HFSpaceService.local_model_available():
+                return await HFSpaceService._predict_hedged(text)
+
+            result = await HFSpaceService.predict_via_space(text)
+            if result["success"]:
                 return result
 
             # Log fallback
             logger.warning(
                 f"HF Space prediction failed: {result.get('error')}, falling back to local model"
             )
+        elif ENABLE_HF_SPACE:
+            logger.info("HF Space circuit open, routing to local model")
 
         # Fallback to local model
-        return await HFSpaceService.predict_local(text, user_label, log_feedback)
+        return await HFSpaceService._predict_local_uncached(text)
+
+    @staticmethod
+    def hedge_delay() -> float:
+        """Detik menunggu Space sebelum hedge: persentil latensi Space terakhir"""
+        delay_ms = HEDGE_DEFAULT_DELAY_MS
+        if space_breaker.get_stats()["latency_samples"] >= HEDGE_MIN_SAMPLES:
+            delay_ms = space_breaker.latency_percentile(HEDGE_PERCENTILE) * 1000.0
+        return max(delay_ms, HEDGE_MIN_DELAY_MS) / 1000.0
+
+    @staticmethod
+    async def _predict_hedged(text: str) -> Dict[str, Any]:
+        """
+        Space dulu; jika belum menjawab setelah hedge_delay(), model lokal ikut
+        dijalankan. Hasil sukses pertama dipakai dan yang kalah dibatalkan.
+        """
+        _hedge_stats["requests"] += 1
+        started = time.perf_counter()
+        space_task = asyncio.ensure_future(HFSpaceService.predict_via_space(text))
+        done, _ = await asyncio.wait({space_task}, timeout=HFSpaceService.hedge_delay())
+        if done:
+            result = space_task.result()
+            if result["success"]:
+                _hedge_stats["space_before_delay"] += 1
+                return result
+            logger.warning(
+                f"HF Space prediction failed: {result.get('error')}, falling back to local model"
+            )
+            return await HFSpaceService._predict_local_uncached(text)
+
+        _hedge_stats["hedges_fired"] += 1
+        local_task = asyncio.ensure_future(HFSpaceService._predict_local_uncached(text))
+        pending = {space_task, local_task}
+        result: Dict[str, Any] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if result["success"]:
+                        winner = "space" if task is space_task else "local"
+                        _hedge_stats[f"{winner}_wins"] += 1
+                        result["hedged"] = True
+                        return result
+            _hedge_stats["both_failed"] += 1
+            return local_task.result()
+        finally:
+            # Batalkan yang kalah (request Space / menunggu hasil micro-batch)
+            for task in pending:
+                task.cancel()
+            # Space yang kalah tidak melapor latensinya; tanpa sampel ini
+            # persentil (dan hedge_delay) hanya melihat jawaban cepat dan terus
+            # turun. Waktu sampai dibatalkan adalah batas bawah latensinya.
+            if space_task in pending:
+                space_breaker.record_latency_sample(time.perf_counter() - started)
+
+    @staticmethod
+    def get_hedge_stats() -> Dict[str, Any]:
+        stats = dict(_hedge_stats)
+        stats["enabled"] = ENABLE_HEDGING
+        stats["percentile"] = HEDGE_PERCENTILE
+        stats["current_delay_ms"] = round(HFSpaceService.hedge_delay() * 1000.0, 1)
+        fired = stats["hedges_fired"] or 1
+        stats["hedge_rate"] = stats["hedges_fired"] / (stats["requests"] or 1)
+        stats["local_win_rate"] = stats["local_wins"] / fired
+        return stats
 
     @staticmethod
     async def predict_local(
@@ -182,6 +308,52 @@ class HFSpaceService:
         Returns:
             Dictionary hasil prediksi
         """
+        result = await HFSpaceService._predict_local_uncached(text)
+        if result["success"] and log_feedback:
+            HFSpaceService.log_feedback(text, result, user_label)
+        return result
+
+    @staticmethod
+    def local_model_available() -> bool:
+        """True jika package Model IndoBERT dan file model lokal tersedia"""
+        try:
+            from src.config import SETTINGS  # type: ignore
+        except ModuleNotFoundError:
+            return False
+        return os.path.isdir(SETTINGS.indobert_model_dir)
+
+    @staticmethod
+    async def exceeds_max_length(text: str) -> bool:
+        """True jika teks lebih panjang dari max_length token model lokal
+
+        Dipakai untuk memilih sliding window hanya bila teks memang akan
+        terpotong; tokenisasi berjalan di thread, bukan di event loop.
+        """
+        if not HFSpaceService.local_model_available():
+            return False
+        from src.config import SETTINGS  # type: ignore
+
+        max_length = SETTINGS.indobert_max_length
+        # Wordpiece tidak pernah menghasilkan token lebih banyak dari karakter
+        if len(text) + 2 <= max_length:
+            return False
+
+        def count_tokens() -> int:
+            from src.modeling.model_manager import get_indobert  # type: ignore
+
+            tokenizer = get_indobert()[0]
+            return len(tokenizer(text, truncation=False)["input_ids"])
+
+        try:
+            return await asyncio.to_thread(count_tokens) > max_length
+        except Exception as e:
+            logger.warning(f"Token count failed, using single-window mode: {e}")
+            return False
+
+    @staticmethod
+    async def _predict_local_uncached(
+        text: str, long_document: bool = False
+    ) -> Dict[str, Any]:
         try:
             # Use stub in Railway production
             try:
@@ -193,56 +365,51 @@ class HFSpaceService:
 
             logger.info("Using local model for prediction")
 
-            preds, probs = predict_indobert(
-                [text],
-                return_proba=True,
-                log_feedback=log_feedback,  # This logs to CSV
-                user_labels=[user_label] if user_label is not None else None,
-            )  # type: ignore
+            if long_document:
+                # All windows of this text are scored in one batched call
+                preds, probs = await inference_executor.run(
+                    functools.partial(
+                        predict_indobert,
+                        [text],
+                        return_proba=True,
+                        log_feedback=False,
+                        long_document=True,
+                        max_windows=LONG_DOC_MAX_WINDOWS,
+                    )
+                )  # type: ignore
+                prediction, prob_hoax = int(preds[0]), float(probs[0])
+                model_name = "indobert"
+            elif ENABLE_MICRO_BATCHING:
+                # Concurrent requests share one batched forward pass
+                prediction, prob_hoax, model_name = await micro_batcher.submit(text)
+            else:
+                # Run inference off the event loop
+                preds, probs, names = await inference_executor.run(
+                    run_local_batch, [text]
+                )
+                prediction, prob_hoax = int(preds[0]), float(probs[0])
+                model_name = names[0]
 
-            prediction = int(preds[0])
-            prob_hoax = float(probs[0])
             confidence = prob_hoax if prediction == 1 else (1 - prob_hoax)
 
-            # Also log to PostgreSQL database
-            if log_feedback:
-                try:
-                    from ..database import get_db
-                    from ..models import Feedback
-                    import time
-
-                    db = next(get_db())
-                    feedback_entry = Feedback(
-                        timestamp=int(time.time()),  # Epoch timestamp as integer
-                        model_name="indobert",
-                        model_version=get_current_version(),
-                        text_length=len(text),
-                        prediction=prediction,
-                        prob_hoax=prob_hoax,
-                        confidence=confidence,
-                        user_label=user_label,
-                        agreement="unknown"
-                        if user_label is None
-                        else ("yes" if user_label == prediction else "no"),
-                        raw_text=text,
-                    )
-                    db.add(feedback_entry)
-                    db.commit()
-                    logger.debug(
-                        f"Feedback logged to PostgreSQL (id={feedback_entry.id})"
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to log feedback to PostgreSQL: {e}")
-
             return {
                 "success": True,
                 "prediction": prediction,
                 "prob_hoax": prob_hoax,
                 "confidence": confidence,
                 "model_version": get_current_version(),
+                "model_name": model_name,
                 "source": "local_model",
             }
 
+        except InferenceBusyError as e:
+            logger.warning(f"Local inference busy: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "busy": True,
+                "source": "local_model",
+            }
         except Exception as e:
             logger.exception(f"Local model prediction error: {e}")
             return {
@@ -252,7 +419,27 @@ class HFSpaceService:
             }
 
     @staticmethod
-    def check_space_health() -> Dict[str, Any]:
+    def log_feedback(
+        text: str, result: Dict[str, Any], user_label: Optional[int] = None
+    ) -> None:
+        """
+        Log hasil prediksi ke local CSV (untuk retrain) dan PostgreSQL database
+
+        Record hanya diantrekan; penulisan CSV/DB dilakukan per batch oleh
+        feedback_writer di luar request path.
+
+        Args:
+            text: Teks berita
+            result: Hasil prediksi sukses (dari HF Space, model lokal, atau cache)
+            user_label: Label dari user (optional)
+        """
+        try:
+            feedback_writer.submit(text, result, user_label)
+        except Exception as e:
+            logger.warning(f"Failed to queue feedback: {e}")
+
+    @staticmethod
+    async def check_space_health() -> Dict[str, Any]:
         """
         Check health status dari HF Space
 
@@ -260,9 +447,7 @@ class HFSpaceService:
             Dictionary dengan status health
         """
         try:
-            import httpx
-
-            response = httpx.get(f"{HF_SPACE_URL}/api/health", timeout=10.0)
+            response = await space_client.get().get("/api/health", timeout=10.0)
 
             if response.status_code == 200:
                 return {
@@ -0,0 +1,95 @@
+"""
+Shared HTTP client untuk panggilan ke HF Space.
+
+Satu httpx.AsyncClient hidup selama aplikasi berjalan (dibuka/ditutup lewat
+FastAPI lifespan) sehingga koneksi TCP+TLS ke Space dipakai ulang
+(keep-alive) dan tidak dibangun ulang di setiap prediksi. HTTP/2 dipakai jika
+package h2 terpasang dan Space mendukungnya (ALPN).
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pool / timeout configuration
+HF_SPACE_URL = os.getenv("HF_SPACE_URL", "https://davidbio-fakenewsdetection.hf.space")
+HF_SPACE_API_KEY = os.getenv("HF_SPACE_API_KEY", "")
+REQUEST_TIMEOUT = float(os.getenv("HF_SPACE_TIMEOUT", "30.0"))
+HF_SPACE_CONNECT_TIMEOUT = float(os.getenv("HF_SPACE_CONNECT_TIMEOUT", "5.0"))
+HF_SPACE_MAX_CONNECTIONS = int(os.getenv("HF_SPACE_MAX_CONNECTIONS", "20"))
+HF_SPACE_MAX_KEEPALIVE = int(os.getenv("HF_SPACE_MAX_KEEPALIVE", "10"))
+HF_SPACE_KEEPALIVE_EXPIRY = float(os.getenv("HF_SPACE_KEEPALIVE_EXPIRY", "60.0"))
+HF_SPACE_HTTP2 = os.getenv("HF_SPACE_HTTP2", "true").lower() == "true"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SpaceClient:
+    """Pemilik httpx.AsyncClient bersama untuk HF Space"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = HF_SPACE_HTTP2 and _http2_available()
+        self._stats: Dict[str, Any] = {"opened": 0, "requests": 0}
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=HF_SPACE_URL,
+            headers=(
+                {"Authorization": f"Bearer {HF_SPACE_API_KEY}"}
+                if HF_SPACE_API_KEY
+                else {}
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=HF_SPACE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HF_SPACE_MAX_CONNECTIONS,
+                max_keepalive_connections=HF_SPACE_MAX_KEEPALIVE,
+                keepalive_expiry=HF_SPACE_KEEPALIVE_EXPIRY,
+            ),
+            http2=self.http2,
+        )
+
+    async def open(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+            self._stats["opened"] += 1
+            logger.info(
+                f"HF Space client opened ({HF_SPACE_URL}, http2={self.http2}, "
+                f"max_connections={HF_SPACE_MAX_CONNECTIONS})"
+            )
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("HF Space client closed")
+        self._client = None
+
+    def get(self) -> httpx.AsyncClient:
+        """Client bersama; dibuat saat dipakai jika lifespan belum membukanya"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+            self._stats["opened"] += 1
+        self._stats["requests"] += 1
+        return self._client
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["open"] = self._client is not None and not self._client.is_closed
+        stats["http2"] = self.http2
+        stats["max_connections"] = HF_SPACE_MAX_CONNECTIONS
+        stats["max_keepalive"] = HF_SPACE_MAX_KEEPALIVE
+        return stats
+
+
+# Singleton instance
+space_client = SpaceClient()
@@ -0,0 +1,112 @@
+"""
+Executor khusus untuk inference model lokal.
+
+predict_indobert bersifat sinkron dan CPU-bound; menjalankannya langsung di
+event loop membuat /health dan endpoint lain ikut tertahan. Executor ini
+menjalankan inference di thread pool terpisah (torch melepas GIL) dengan
+jumlah worker dan antrean yang dibatasi.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Executor configuration
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "32"))
+INFERENCE_QUEUE_TIMEOUT = float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "30.0"))
+
+
+class InferenceBusyError(RuntimeError):
+    """Antrean inference penuh (backpressure)"""
+
+
+class InferenceExecutor:
+    """Thread pool terbatas untuk menjalankan inference di luar event loop"""
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = max(1, workers)
+        self.max_pending = max(0, max_pending)
+        self.queue_timeout = queue_timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._stats: Dict[str, Any] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "total_run_seconds": 0.0,
+        }
+
+    def _ensure(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            # Running jobs + jobs allowed to wait for a free worker
+            self._slots = asyncio.Semaphore(self.workers + self.max_pending)
+        return self._slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Jalankan fn(*args) di thread pool inference
+
+        Raises:
+            InferenceBusyError: jika antrean tetap penuh selama queue_timeout
+        """
+        slots = self._ensure()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            raise InferenceBusyError(
+                f"Local inference queue full ({self.workers} workers, "
+                f"{self.max_pending} pending)"
+            )
+
+        self._stats["submitted"] += 1
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = await self._loop.run_in_executor(self._pool, fn, *args)
+            self._stats["completed"] += 1
+            return result
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._stats["total_run_seconds"] += time.perf_counter() - started
+            self._in_flight -= 1
+            slots.release()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("Inference executor shut down")
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["max_pending"] = self.max_pending
+        stats["in_flight"] = self._in_flight
+        stats["avg_run_ms"] = (
+            stats["total_run_seconds"] / (stats["completed"] + stats["failed"] or 1)
+        ) * 1000.0
+        return stats
+
+
+# Singleton instance
+inference_executor = InferenceExecutor(
+    INFERENCE_WORKERS, INFERENCE_MAX_PENDING, INFERENCE_QUEUE_TIMEOUT
+)
@@ -0,0 +1,249 @@
+"""
+Service untuk micro-batching request prediksi lokal.
+
+Request yang datang dalam jendela waktu singkat digabung menjadi satu batch
+predict_indobert, lalu setiap caller menerima hasilnya masing-masing.
+Di dalam batch, teks dikelompokkan per panjang token dan dipotong per budget
+token (src.modeling.batching) sehingga forward pendek tidak di-pad sepanjang
+artikel; padding efficiency tampil di /health/inference.
+
+Sampai INFERENCE_WORKERS batch berjalan bersamaan di inference executor.
+Antrean teks dibatasi (MICRO_BATCH_MAX_QUEUE); jika penuh, submit menunggu
+ruang sampai INFERENCE_QUEUE_TIMEOUT (sama seperti inference executor) sebelum
+gagal dengan InferenceBusyError dan /predict menjawab 503.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .inference_executor import InferenceBusyError, inference_executor
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching configuration
+ENABLE_MICRO_BATCHING = os.getenv("ENABLE_MICRO_BATCHING", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "16"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "10"))
+# Max teks yang antre; 0 = INFERENCE_WORKERS x MICRO_BATCH_MAX_SIZE x 2
+# (satu batch berjalan + satu batch menunggu per worker)
+MICRO_BATCH_MAX_QUEUE = int(os.getenv("MICRO_BATCH_MAX_QUEUE", "0"))
+# indobert | cascade (FastText dulu, IndoBERT hanya untuk teks yang ragu)
+LOCAL_INFERENCE_MODE = os.getenv("LOCAL_INFERENCE_MODE", "indobert").lower()
+
+
+_cascade_warned = False
+
+
+def _warn_cascade_unavailable() -> None:
+    global _cascade_warned
+    if not _cascade_warned:
+        _cascade_warned = True
+        logger.warning(
+            "LOCAL_INFERENCE_MODE=cascade but src.modeling is unavailable; "
+            "using the indobert path"
+        )
+
+
+def run_local_batch(texts: List[str]) -> Tuple[List[int], List[float], List[str]]:
+    """
+    Jalankan satu batch inference lokal tanpa logging feedback
+
+    Returns:
+        Tuple (predictions, prob_hoax, model_names); model_name mencatat
+        stage yang memutuskan (indobert, atau cascade:fasttext/cascade:indobert)
+    """
+    predict_cascade = None
+    if LOCAL_INFERENCE_MODE == "cascade":
+        try:
+            from src.modeling.predict import predict_cascade  # type: ignore
+        except ModuleNotFoundError:
+            # Railway: tanpa Model IndoBERT, pakai jalur indobert/stub di bawah
+            _warn_cascade_unavailable()
+
+    if predict_cascade is not None:
+        preds, probs, stages = predict_cascade(
+            texts, return_proba=True, log_feedback=False, return_stages=True
+        )  # type: ignore
+        model_names = [f"cascade:{stage}" for stage in stages]
+    else:
+        try:
+            from src.modeling.predict import predict_indobert  # type: ignore
+        except ModuleNotFoundError:
+            from .predict_stub import predict_indobert
+
+        preds, probs = predict_indobert(
+            texts, return_proba=True, log_feedback=False
+        )  # type: ignore
+        model_names = ["indobert"] * len(preds)
+    if len(preds) != len(texts):
+        raise RuntimeError("Local model returned no predictions")
+    return list(preds), list(probs), model_names
+
+
+class MicroBatcher:
+    """Kumpulkan request prediksi menjadi batch untuk satu forward pass"""
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_queue: int = 0,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        # Batch berjalan bersamaan sebanyak worker executor
+        self.max_concurrent = inference_executor.workers
+        self.max_queue = max_queue or self.max_concurrent * self.max_batch_size * 2
+        # Lama menunggu ruang di antrean sebelum busy (default: executor)
+        self.queue_timeout = (
+            inference_executor.queue_timeout if queue_timeout is None else queue_timeout
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "batches": 0,
+            "errors": 0,
+            "rejected": 0,
+            "queue_full_waits": 0,
+            "max_concurrent_seen": 0,
+            "last_batch_size": 0,
+            "max_batch_size_seen": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "total_inference_seconds": 0.0,
+        }
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def submit(self, text: str) -> Tuple[int, float, str]:
+        """
+        Masukkan satu teks ke antrean batch
+
+        Returns:
+            Tuple (prediction, prob_hoax, model_name) untuk teks ini
+
+        Raises:
+            InferenceBusyError: jika antrean tetap penuh selama queue_timeout
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        item = (text, future, time.perf_counter())
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._stats["queue_full_waits"] += 1
+            try:
+                await asyncio.wait_for(queue.put(item), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._stats["rejected"] += 1
+                raise InferenceBusyError(
+                    f"Micro-batch queue full ({self.max_queue} texts waiting)"
+                )
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future, float]]:
+        queue = self._queue
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # Tunggu worker bebas dulu; selama itu request terus terkumpul
+            # sehingga batch berikutnya lebih penuh
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            # Caller yang sudah dibatalkan tidak perlu diprediksi
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._running.add(task)
+            self._stats["max_concurrent_seen"] = max(
+                self._stats["max_concurrent_seen"], len(self._running)
+            )
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """Satu batch di executor; slot dilepas setelah selesai"""
+        texts = [text for text, _, _ in batch]
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued in batch]
+        try:
+            preds, probs, names = await inference_executor.run(run_local_batch, texts)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.exception(f"Micro-batch inference failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._record(len(batch), waits, time.perf_counter() - started)
+            self._slots.release()
+
+        for (_, future, _), pred, prob, name in zip(batch, preds, probs, names):
+            if not future.done():
+                future.set_result((int(pred), float(prob), name))
+
+    def _record(self, size: int, waits: List[float], inference: float) -> None:
+        stats = self._stats
+        stats["requests"] += size
+        stats["batches"] += 1
+        stats["last_batch_size"] = size
+        stats["max_batch_size_seen"] = max(stats["max_batch_size_seen"], size)
+        stats["total_wait_seconds"] += sum(waits)
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], max(waits))
+        stats["total_inference_seconds"] += inference
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metrics: queue depth, ukuran batch, dan waktu tunggu"""
+        stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        requests = stats["requests"] or 1
+        stats["enabled"] = ENABLE_MICRO_BATCHING
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        stats["max_queue"] = self.max_queue
+        stats["queue_timeout"] = self.queue_timeout
+        stats["max_concurrent"] = self.max_concurrent
+        stats["running_batches"] = len(self._running)
+        stats["avg_batch_size"] = stats["requests"] / batches
+        stats["avg_wait_ms"] = stats["total_wait_seconds"] / requests * 1000.0
+        stats["avg_inference_ms"] = stats["total_inference_seconds"] / batches * 1000.0
+        return stats
+
+
+# Singleton instance
+micro_batcher = MicroBatcher(
+    MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_QUEUE
+)
@@ -0,0 +1,184 @@
+"""
+Service untuk mengunduh snapshot model lokal dari Hugging Face Hub di background.
+
+Download snapshot ratusan MB tidak lagi menahan startup: file diunduh
+paralel (hf_hub_download, bisa dilanjutkan jika terputus) ke folder sementara,
+setiap file diverifikasi checksum-nya (sha256 untuk file LFS, git blob sha1
+untuk file biasa), lalu folder dipindahkan ke models/indobert secara atomik.
+Selama proses berjalan, local_model_available() tetap False sehingga prediksi
+dilayani HF Space; progress tampil di /health/ready (stage "model_download").
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .readiness import DONE, SKIPPED, readiness
+
+logger = logging.getLogger(__name__)
+
+# Download configuration
+HF_MODEL_REPO = os.getenv("HF_MODEL_REPO", "")
+HF_TOKEN = os.getenv("HF_TOKEN") or None
+MODEL_DOWNLOAD_WORKERS = int(os.getenv("MODEL_DOWNLOAD_WORKERS", "4"))
+MODEL_DOWNLOAD_RETRIES = int(os.getenv("MODEL_DOWNLOAD_RETRIES", "3"))
+
+STAGE = "model_download"
+
+_thread: Optional[threading.Thread] = None
+
+
+class ChecksumError(RuntimeError):
+    """File hasil download tidak cocok dengan checksum di Hub"""
+
+
+def _file_digest(path: Path, algo: str, prefix: bytes = b"") -> str:
+    h = hashlib.new(algo)
+    h.update(prefix)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _verify(path: Path, sibling: Any) -> None:
+    lfs = getattr(sibling, "lfs", None)
+    if lfs is not None:
+        expected = lfs.sha256 if hasattr(lfs, "sha256") else lfs["sha256"]
+        actual = _file_digest(path, "sha256")
+    elif getattr(sibling, "blob_id", None):
+        # Non-LFS file: git blob id = sha1("blob <size>\0" + content)
+        expected = sibling.blob_id
+        actual = _file_digest(path, "sha1", b"blob %d\0" % path.stat().st_size)
+    else:
+        return
+    if actual != expected:
+        raise ChecksumError(f"{sibling.rfilename}: expected {expected}, got {actual}")
+
+
+def _download_file(repo_id: str, sibling: Any, staging: Path) -> int:
+    """Unduh satu file (resume otomatis) dan verifikasi; return ukuran bytes"""
+    from huggingface_hub import hf_hub_download
+
+    last_error: Optional[Exception] = None
+    for attempt in range(1, MODEL_DOWNLOAD_RETRIES + 1):
+        try:
+            path = Path(
+                hf_hub_download(
+                    repo_id=repo_id,
+                    filename=sibling.rfilename,
+                    local_dir=str(staging),
+                    token=HF_TOKEN,
+                )
+            )
+            _verify(path, sibling)
+            return path.stat().st_size
+        except ChecksumError as e:
+            # File korup: hapus supaya percobaan berikutnya mengunduh ulang
+            last_error = e
+            (staging / sibling.rfilename).unlink(missing_ok=True)
+        except Exception as e:
+            last_error = e  # partial download dilanjutkan pada percobaan berikutnya
+        logger.warning(
+            f"Download {sibling.rfilename} attempt {attempt} failed: {last_error}"
+        )
+    raise last_error  # type: ignore[misc]
+
+
+def download_snapshot(repo_id: str, dest_dir: Path) -> Dict[str, Any]:
+    """Unduh semua file repo ke dest_dir; progress dicatat di readiness"""
+    from huggingface_hub import HfApi
+
+    info = HfApi().model_info(repo_id, files_metadata=True, token=HF_TOKEN)
+    siblings = list(info.siblings or [])
+    total_bytes = sum(s.size or 0 for s in siblings)
+    readiness.update(
+        STAGE,
+        repo=repo_id,
+        files_total=len(siblings),
+        files_done=0,
+        bytes_total=total_bytes,
+        bytes_done=0,
+    )
+
+    # Staging dir di sebelah tujuan supaya rename atomik (filesystem sama)
+    staging = dest_dir.with_name(dest_dir.name + ".partial")
+    staging.mkdir(parents=True, exist_ok=True)
+
+    files_done = 0
+    bytes_done = 0
+    with ThreadPoolExecutor(
+        max_workers=max(1, MODEL_DOWNLOAD_WORKERS), thread_name_prefix="model-download"
+    ) as pool:
+        futures = {
+            pool.submit(_download_file, repo_id, s, staging): s for s in siblings
+        }
+        for future in as_completed(futures):
+            bytes_done += future.result()
+            files_done += 1
+            readiness.update(
+                STAGE,
+                files_done=files_done,
+                bytes_done=bytes_done,
+                percent=round(100.0 * bytes_done / total_bytes, 1) if total_bytes else None,
+            )
+
+    # Metadata cache huggingface_hub tidak ikut dipindahkan
+    shutil.rmtree(staging / ".cache", ignore_errors=True)
+    if dest_dir.exists():
+        shutil.rmtree(dest_dir)  # folder kosong / sisa yang tidak lengkap
+    os.replace(staging, dest_dir)
+    logger.info(f"Model snapshot {repo_id} downloaded to {dest_dir}")
+    return {"files": files_done, "bytes": bytes_done, "revision": info.sha}
+
+
+def _run(repo_id: str, dest_dir: Path) -> None:
+    from .readiness import start_warmup
+
+    readiness.run_stage(STAGE, lambda: download_snapshot(repo_id, dest_dir))
+    if readiness.get_status()["stages"][STAGE]["state"] == DONE:
+        # Model lokal baru tersedia: hangatkan tanpa menahan readiness
+        start_warmup(required=False)
+
+
+def start_background_download(dest_dir: Path) -> bool:
+    """
+    Mulai download di background jika model lokal belum ada
+
+    Returns:
+        True jika download dimulai (warm-up dijalankan setelah download selesai)
+    """
+    global _thread
+    try:
+        import huggingface_hub  # noqa: F401
+    except ImportError:
+        logger.debug("huggingface_hub not installed; skipping HF model download")
+        return False
+    if not HF_MODEL_REPO:
+        logger.debug("HF_MODEL_REPO not set; skipping HF model download")
+        return False
+    if dest_dir.exists() and any(dest_dir.iterdir()):
+        logger.info("Model directory exists locally at %s, skipping download", dest_dir)
+        readiness.finish(STAGE, SKIPPED, "model already present")
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+
+    # HF Space tetap melayani prediksi, jadi download tidak menahan /health
+    readiness.register(STAGE, required=False)
+    logger.info("Downloading model snapshot from %s to %s (background)", HF_MODEL_REPO, dest_dir)
+    _thread = threading.Thread(
+        target=_run, args=(HF_MODEL_REPO, dest_dir), name="model-download", daemon=True
+    )
+    _thread.start()
+    return True
+
+
+def is_downloading() -> bool:
+    return _thread is not None and _thread.is_alive()
+
@@ -0,0 +1,141 @@
+"""
+Service untuk lookup verdict dari teks yang hampir sama (near-duplicate).
+
+Hoaks sering diteruskan dengan sedikit perubahan (emoji, "SEBARKAN!!", URL
+berbeda) sehingga exact-hash cache tidak kena. Service ini memakai MinHash
+LSH index dari src.near_duplicate dan mengembalikan verdict yang sudah ada
+jika kemiripan di atas threshold.
+
+Index dibangun di background thread (paling banyak satu sekaligus) dan
+ditukar utuh setelah selesai; selama belum siap, atau index dibangun untuk
+versi model lain, lookup dilewati. Hasil membawa provenance tetangga yang
+cocok (model_name/model_version baris tersebut), bukan versi model saat ini.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ENABLE_NEAR_DUPLICATE = os.getenv("ENABLE_NEAR_DUPLICATE", "true").lower() == "true"
+NEAR_DUPLICATE_REFRESH_SECONDS = float(
+    os.getenv("NEAR_DUPLICATE_REFRESH_SECONDS", "60")
+)
+NEAR_DUPLICATE_INCLUDE_PROCESSED = (
+    os.getenv("NEAR_DUPLICATE_INCLUDE_PROCESSED", "true").lower() == "true"
+)
+
+try:
+    from src import near_duplicate  # type: ignore
+    from src.services.model_registry import get_current_version  # type: ignore
+except ModuleNotFoundError:
+    # Railway: Model IndoBERT tidak tersedia, lookup dinonaktifkan
+    near_duplicate = None
+
+_refresh_lock = threading.Lock()
+_refreshing = False
+_last_refresh = 0.0
+_stats: Dict[str, Any] = {
+    "lookups": 0,
+    "hits": 0,
+    "skipped_not_ready": 0,
+    "skipped_stale_version": 0,
+}
+
+
+def _refresh(model_version: Optional[str]) -> None:
+    """Bangun index (pertama kali / versi berubah) atau tambahkan feedback baru"""
+    global _last_refresh, _refreshing
+    try:
+        started = time.perf_counter()
+        index = near_duplicate.get_index(
+            include_processed=NEAR_DUPLICATE_INCLUDE_PROCESSED,
+            model_version=model_version,
+        )
+        logger.debug(
+            f"Near-duplicate index refreshed: {len(index)} texts "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+    except Exception as e:
+        logger.warning(f"Near-duplicate index refresh failed: {e}")
+    finally:
+        with _refresh_lock:
+            _last_refresh = time.monotonic()
+            _refreshing = False
+
+
+def _start_refresh(model_version: Optional[str]) -> None:
+    """Mulai refresh di background kecuali sudah ada yang berjalan"""
+    global _refreshing
+    with _refresh_lock:
+        if _refreshing:
+            return
+        _refreshing = True
+    threading.Thread(
+        target=_refresh,
+        args=(model_version,),
+        name="near-duplicate-index",
+        daemon=True,
+    ).start()
+
+
+def start_background_build() -> None:
+    """Dipanggil saat startup supaya request pertama tidak menunggu index"""
+    if ENABLE_NEAR_DUPLICATE and near_duplicate is not None:
+        _start_refresh(get_current_version())
+
+
+def lookup(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Cari verdict untuk teks yang hampir sama dengan teks yang pernah dinilai
+
+    Returns:
+        Dictionary hasil prediksi (format sama dengan HFSpaceService), atau None
+    """
+    if not ENABLE_NEAR_DUPLICATE or near_duplicate is None:
+        return None
+
+    _stats["lookups"] += 1
+    version = get_current_version()
+    index = near_duplicate.get_index_nowait()
+    if index is None:
+        _stats["skipped_not_ready"] += 1
+        _start_refresh(version)
+        return None
+    if index.model_version != version:
+        # Model baru: index lama berisi verdict versi sebelumnya
+        _stats["skipped_stale_version"] += 1
+        _start_refresh(version)
+        return None
+
+    # Feedback baru di-index di background, tidak di jalur request
+    if time.monotonic() - _last_refresh > NEAR_DUPLICATE_REFRESH_SECONDS:
+        _start_refresh(version)
+
+    match = index.query(text)
+    if match is None:
+        return None
+
+    _stats["hits"] += 1
+    return {
+        "success": True,
+        "prediction": int(match.label),
+        "prob_hoax": float(match.prob_hoax),
+        "confidence": max(match.prob_hoax, 1 - match.prob_hoax),
+        "model_version": match.model_version,
+        "source": "near_duplicate",
+        "similarity": match.similarity,
+        "matched_source": match.source,
+        "matched_model_name": match.model_name,
+    }
+
+
+def get_stats() -> Dict[str, Any]:
+    stats = dict(_stats)
+    stats["enabled"] = ENABLE_NEAR_DUPLICATE and near_duplicate is not None
+    if near_duplicate is not None and near_duplicate.is_ready():
+        stats["index"] = near_duplicate.get_index_nowait().stats()
+    return stats
@@ -0,0 +1,169 @@
+"""
+Cache hasil prediksi berbasis konten (LRU + TTL).
+
+Key = hash dari normalize_text(text) + versi model aktif, sehingga teks hoaks
+yang sama (beda spasi/emoji/URL) langsung dijawab tanpa memanggil HF Space
+maupun model lokal. Cache dikosongkan otomatis saat current_version di
+registry berubah.
+
+Di belakang cache memori ada PredictionStore (SQLite) yang bertahan setelah
+redeploy dan dipakai bersama antar worker uvicorn. Akses store berjalan di
+thread-nya sendiri, sehingga get() bersifat async dan put() tidak menunggu.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .prediction_store import PredictionStore, prediction_store
+
+# Use stub in Railway production
+try:
+    from src.features import normalize_text  # type: ignore
+    from src.services.model_registry import get_current_version  # type: ignore
+except ModuleNotFoundError:
+    from .features_stub import normalize_text
+    from .model_registry_stub import get_current_version
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+ENABLE_PREDICTION_CACHE = (
+    os.getenv("ENABLE_PREDICTION_CACHE", "true").lower() == "true"
+)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 dari teks yang sudah dinormalisasi
+
+    Teks yang habis saat dinormalisasi (hanya URL/emoji/tanda baca) di-hash
+    mentah; kalau tidak semuanya berbagi key sha256("") dan satu verdict.
+    """
+    normalized = normalize_text(text)
+    if not normalized.strip():
+        normalized = "\x00raw\x00" + text
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """LRU cache dengan TTL untuk hasil prediksi sukses"""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        store: Optional[PredictionStore] = None,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl_seconds
+        self.store = store
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def key_for(self, text: str, variant: str = "") -> str:
+        """
+        Key cache untuk teks pada versi model aktif.
+
+        variant membedakan mode inference (misalnya "long" untuk sliding window).
+
+        Jika versi model berubah sejak akses terakhir, seluruh cache dibuang.
+        """
+        version = get_current_version()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._stats["invalidations"] += 1
+                    logger.info(
+                        f"Model version changed {self._version} -> {version}, "
+                        "clearing prediction cache"
+                    )
+                self._entries.clear()
+                self._version = version
+                changed = True
+            else:
+                changed = False
+        if changed and self.store is not None:
+            self.store.drop_other_versions_async(version)
+        prefix = f"{version}:{variant}:" if variant else f"{version}:"
+        return prefix + text_hash(text)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if self.ttl > 0 and now - stored_at > self.ttl:
+                    del self._entries[key]
+                    self._stats["expired"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return dict(result)
+
+        # Memory miss: another worker (or a previous process) may have it
+        if self.store is not None:
+            stored = await self.store.get_async(key)
+            if stored is not None:
+                self._put_memory(key, stored)
+                with self._lock:
+                    self._stats["store_hits"] += 1
+                return dict(stored)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        self._put_memory(key, result)
+        if self.store is not None:
+            self.store.put_async(key, key.split(":", 1)[0], result)
+
+    def _put_memory(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["store_hits"] + stats["misses"]
+        stats["enabled"] = ENABLE_PREDICTION_CACHE
+        stats["max_size"] = self.max_size
+        stats["ttl_seconds"] = self.ttl
+        stats["model_version"] = self._version
+        stats["hit_ratio"] = (
+            (stats["hits"] + stats["store_hits"]) / lookups if lookups else 0.0
+        )
+        if self.store is not None:
+            stats["store"] = self.store.get_stats()
+        return stats
+
+
+# Singleton instance
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, store=prediction_store
+)
@@ -0,0 +1,232 @@
+"""
+Persistent prediction cache (SQLite) yang bertahan setelah restart.
+
+File database dipakai bersama oleh semua worker uvicorn: SQLite dibuka dalam
+mode WAL sehingga banyak reader bisa berjalan bersamaan dengan satu writer.
+Jumlah baris dibatasi; baris yang paling lama tidak diakses dibuang lebih dulu.
+
+Semua operasi SQLite berjalan di satu thread khusus (get_async/put_async/
+drop_other_versions_async), tidak pernah di event loop: tunggu lock SQLite,
+eviction dan cleanup versi tidak menahan request lain. Hit tidak langsung
+menulis last_access; key yang diakses dikumpulkan dan di-update sekaligus
+paling sering tiap _TOUCH_FLUSH_SECONDS.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Path to store file - handle both local and Railway environments
+try:
+    DEFAULT_STORE_PATH = (
+        Path(__file__).resolve().parents[4]
+        / "Model IndoBERT"
+        / "data"
+        / "cache"
+        / "predictions.db"
+    )
+except (IndexError, ValueError):
+    # Railway/Docker - use temp directory
+    DEFAULT_STORE_PATH = Path("/tmp/predictions.db")
+
+ENABLE_PREDICTION_STORE = (
+    os.getenv("ENABLE_PREDICTION_STORE", "true").lower() == "true"
+)
+PREDICTION_STORE_PATH = Path(
+    os.getenv("PREDICTION_STORE_PATH", str(DEFAULT_STORE_PATH))
+)
+PREDICTION_STORE_MAX_ROWS = int(os.getenv("PREDICTION_STORE_MAX_ROWS", "200000"))
+PREDICTION_STORE_TTL = float(os.getenv("PREDICTION_STORE_TTL", str(7 * 86400)))
+
+# Evict only every N writes so the COUNT/DELETE cost is amortized
+_EVICT_EVERY = 500
+# last_access updates for hits are batched into one write per interval
+_TOUCH_FLUSH_SECONDS = 30.0
+
+
+class PredictionStore:
+    """Key-value store hasil prediksi di SQLite (aman untuk banyak proses)"""
+
+    def __init__(self, path: Path, max_rows: int, ttl_seconds: float):
+        self.path = Path(path)
+        self.max_rows = max(1, max_rows)
+        self.ttl = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        self._rows: Optional[int] = None
+        # Hanya disentuh di thread store
+        self._touched: Set[str] = set()
+        self._touch_flushed = time.monotonic()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prediction-store"
+        )
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evicted": 0,
+            "errors": 0,
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS predictions (
+                    key TEXT PRIMARY KEY,
+                    model_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_predictions_last_access "
+                "ON predictions (last_access)"
+            )
+            conn.commit()
+            (self._rows,) = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT result, created_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl > 0 and time.time() - row[1] > self.ttl):
+                self._stats["misses"] += 1
+                return None
+            # Recency dicatat di memori; ditulis per batch (tanpa write lock per hit)
+            self._touched.add(key)
+            self._flush_touched()
+            self._stats["hits"] += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Prediction store read failed: {e}")
+            return None
+
+    def _flush_touched(self, force: bool = False) -> None:
+        if not self._touched:
+            return
+        if not force and time.monotonic() - self._touch_flushed < _TOUCH_FLUSH_SECONDS:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.executemany(
+            "UPDATE predictions SET last_access = ? WHERE key = ?",
+            [(now, key) for key in self._touched],
+        )
+        conn.commit()
+        self._touched.clear()
+        self._touch_flushed = time.monotonic()
+
+    def put(self, key: str, model_version: str, result: Dict[str, Any]) -> None:
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions "
+                "(key, model_version, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model_version, json.dumps(result, ensure_ascii=False), now, now),
+            )
+            conn.commit()
+            self._stats["writes"] += 1
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Prediction store write failed: {e}")
+
+    def evict(self) -> int:
+        """Buang baris kedaluwarsa dan baris LRU di atas max_rows"""
+        conn = self._conn()
+        self._flush_touched(force=True)
+        removed = 0
+        if self.ttl > 0:
+            cur = conn.execute(
+                "DELETE FROM predictions WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+            removed += cur.rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()
+        overflow = count - self.max_rows
+        if overflow > 0:
+            cur = conn.execute(
+                "DELETE FROM predictions WHERE key IN ("
+                "SELECT key FROM predictions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            removed += cur.rowcount
+        conn.commit()
+        self._rows = count - max(0, overflow)
+        self._stats["evicted"] += removed
+        return removed
+
+    def drop_other_versions(self, model_version: str) -> None:
+        """Hapus hasil dari versi model selain model_version"""
+        try:
+            conn = self._conn()
+            conn.execute(
+                "DELETE FROM predictions WHERE model_version != ?", (model_version,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Prediction store cleanup failed: {e}")
+
+    # --------------------------
+    # Async API: SQLite di thread store, tidak di event loop
+    # --------------------------
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get, key)
+
+    def put_async(self, key: str, model_version: str, result: Dict[str, Any]) -> None:
+        """Jadwalkan penulisan di thread store tanpa menunggu (fire-and-forget)"""
+        self._executor.submit(self.put, key, model_version, dict(result))
+
+    def drop_other_versions_async(self, model_version: str) -> None:
+        self._executor.submit(self.drop_other_versions, model_version)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["enabled"] = ENABLE_PREDICTION_STORE
+        stats["path"] = str(self.path)
+        stats["max_rows"] = self.max_rows
+        stats["ttl_seconds"] = self.ttl
+        # Jumlah baris dari eviction terakhir (tanpa COUNT(*) di event loop)
+        stats["rows"] = self._rows
+        stats["pending_touches"] = len(self._touched)
+        return stats
+
+
+# Singleton instance (None jika dinonaktifkan)
+prediction_store: Optional[PredictionStore] = (
+    PredictionStore(
+        PREDICTION_STORE_PATH, PREDICTION_STORE_MAX_ROWS, PREDICTION_STORE_TTL
+    )
+    if ENABLE_PREDICTION_STORE
+    else None
+)
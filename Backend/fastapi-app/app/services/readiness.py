@@ -0,0 +1,143 @@
+"""
+Service untuk status kesiapan (readiness) instance.
+
+Startup dipecah menjadi beberapa stage (mis. warm-up model lokal). Setiap
+stage punya state pending/running/done/failed/skipped beserta durasinya.
+Instance dianggap siap jika tidak ada stage wajib yang masih pending/running,
+sehingga /health bisa mengembalikan 503 sampai model hangat dan Railway hanya
+merutekan traffic ke instance yang siap.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Warm-up configuration
+ENABLE_WARMUP = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+WARMUP_TOKEN_LENGTHS = tuple(
+    int(n) for n in os.getenv("WARMUP_TOKEN_LENGTHS", "16,64,256").split(",") if n
+)
+WARMUP_BATCH_SIZES = tuple(
+    int(n) for n in os.getenv("WARMUP_BATCH_SIZES", "1,8").split(",") if n
+)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class ReadinessTracker:
+    """Lacak stage startup dan tentukan apakah instance siap menerima traffic"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._started = time.time()
+
+    def register(self, name: str, required: bool = True) -> None:
+        with self._lock:
+            self._stages.setdefault(
+                name, {"state": PENDING, "required": required, "seconds": None}
+            )
+
+    def start(self, name: str) -> None:
+        with self._lock:
+            stage = self._stages.setdefault(name, {"required": True})
+            stage.update(state=RUNNING, started_at=time.time(), seconds=None)
+
+    def update(self, name: str, **info: Any) -> None:
+        """Tambahkan info progress ke stage (mis. bytes terunduh)"""
+        with self._lock:
+            self._stages.setdefault(name, {"state": PENDING, "required": True}).update(
+                info
+            )
+
+    def finish(
+        self, name: str, state: str = DONE, detail: Optional[Any] = None
+    ) -> None:
+        with self._lock:
+            stage = self._stages.setdefault(name, {"required": True})
+            started = stage.get("started_at")
+            stage["state"] = state
+            stage["seconds"] = round(time.time() - started, 3) if started else None
+            if detail is not None:
+                stage["detail"] = detail
+
+    def run_stage(self, name: str, fn: Callable[[], Any]) -> None:
+        """Jalankan fn sebagai stage; exception dicatat sebagai FAILED"""
+        self.start(name)
+        try:
+            self.finish(name, DONE, fn())
+        except Exception as e:
+            logger.exception(f"Startup stage {name} failed: {e}")
+            self.finish(name, FAILED, str(e))
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return not any(
+                s.get("required", True) and s.get("state") in (PENDING, RUNNING)
+                for s in self._stages.values()
+            )
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {k: v for k, v in stage.items() if k != "started_at"}
+                for name, stage in self._stages.items()
+            }
+        return {
+            "ready": self.is_ready(),
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "stages": stages,
+        }
+
+
+def _warm_up_local_model() -> Any:
+    from src.modeling.model_manager import warm_up  # type: ignore
+    from .micro_batcher import LOCAL_INFERENCE_MODE
+
+    report = warm_up(
+        token_lengths=WARMUP_TOKEN_LENGTHS,
+        batch_sizes=WARMUP_BATCH_SIZES,
+        include_fasttext=LOCAL_INFERENCE_MODE == "cascade",
+    )
+    logger.info(f"Local model warm-up finished in {report['total_seconds']:.2f}s: {report}")
+    return report
+
+
+def start_warmup(required: bool = True) -> None:
+    """
+    Warm-up model lokal di background thread
+
+    Args:
+        required: True -> /health not-ready sampai warm-up selesai. False
+            dipakai setelah download di background, saat HF Space sudah
+            melayani traffic.
+    """
+    from .hf_space_service import HFSpaceService
+
+    if not ENABLE_WARMUP:
+        readiness.finish("warmup", SKIPPED, "ENABLE_WARMUP=false")
+        return
+    if not HFSpaceService.local_model_available():
+        # Railway: inference lewat HF Space, tidak ada yang perlu dihangatkan
+        readiness.finish("warmup", SKIPPED, "local model not available")
+        return
+
+    readiness.register("warmup", required=required)
+    threading.Thread(
+        target=readiness.run_stage,
+        args=("warmup", _warm_up_local_model),
+        name="model-warmup",
+        daemon=True,
+    ).start()
+
+
+# Singleton instance
+readiness = ReadinessTracker()
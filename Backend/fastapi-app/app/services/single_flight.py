@@ -0,0 +1,82 @@
+"""
+Single-flight untuk request prediksi identik yang sedang berjalan.
+
+Saat hoaks viral, puluhan teks yang sama datang hampir bersamaan sebelum hasil
+pertama sempat masuk prediction cache. Request dengan key yang sama (hash teks
+ternormalisasi + versi model, lihat PredictionCache.key_for) menunggu satu
+task bersama alih-alih masing-masing memanggil HF Space/model lokal. Setiap
+caller menerima salinan hasilnya sendiri (dan tetap mencatat feedback-nya
+sendiri).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+ENABLE_SINGLE_FLIGHT = os.getenv("ENABLE_SINGLE_FLIGHT", "true").lower() == "true"
+
+
+class SingleFlight:
+    """Gabungkan panggilan async identik yang sedang berjalan menjadi satu"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "leaders": 0,
+            "coalesced": 0,
+            "max_waiters": 0,
+        }
+        self._waiters: Dict[str, int] = {}
+
+    async def run(
+        self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Jalankan fn() sekali per key yang sedang berjalan
+
+        Returns:
+            Salinan hasil fn(); caller yang ikut menunggu mendapat
+            "coalesced": True
+        """
+        self._stats["requests"] += 1
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if task is None:
+            self._stats["leaders"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda _: self._done(key))
+        else:
+            self._stats["coalesced"] += 1
+            self._waiters[key] += 1
+            self._stats["max_waiters"] = max(
+                self._stats["max_waiters"], self._waiters[key]
+            )
+
+        # shield: caller yang disconnect tidak membatalkan task bersama
+        result = dict(await asyncio.shield(task))
+        if coalesced:
+            result["coalesced"] = True
+        return result
+
+    def _done(self, key: str) -> None:
+        self._inflight.pop(key, None)
+        self._waiters.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["enabled"] = ENABLE_SINGLE_FLIGHT
+        stats["in_flight"] = len(self._inflight)
+        stats["coalesced_ratio"] = (
+            stats["coalesced"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        return stats
+
+
+# Singleton instance
+single_flight = SingleFlight()
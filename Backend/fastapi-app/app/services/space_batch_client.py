@@ -0,0 +1,245 @@
+"""
+Batch client untuk HF Space.
+
+predict_via_space mengirim satu teks per request. Untuk bulk job, teks dikirim
+sebagai list ke POST /api/predict/batch: input dipecah per chunk
+(HF_SPACE_BATCH_SIZE, dibatasi max_batch_size yang diiklankan Space), paling
+banyak HF_SPACE_BATCH_CONCURRENCY chunk berjalan bersamaan, dan setiap item
+mendapat hasilnya sendiri (sukses atau error) sesuai urutan input.
+
+Dukungan batch dibaca dari /api/health ("capabilities": {"batch": true,
+"max_batch_size": N}) dan di-cache selama HF_SPACE_BATCH_PROBE_TTL detik.
+Jika Space tidak mengiklankannya (atau endpoint batch menjawab 404/405/501),
+client kembali ke satu request predict_via_space per teks.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .circuit_breaker import space_breaker
+from .http_client import space_client
+
+logger = logging.getLogger(__name__)
+
+# Batch configuration
+HF_SPACE_BATCH_SIZE = int(os.getenv("HF_SPACE_BATCH_SIZE", "32"))
+HF_SPACE_BATCH_CONCURRENCY = int(os.getenv("HF_SPACE_BATCH_CONCURRENCY", "4"))
+HF_SPACE_BATCH_PROBE_TTL = float(os.getenv("HF_SPACE_BATCH_PROBE_TTL", "300"))
+
+# Status yang berarti endpoint batch tidak ada di Space ini
+_UNSUPPORTED_STATUS = (404, 405, 501)
+
+
+def parse_space_prediction(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Ubah satu hasil JSON Space menjadi dict hasil prediksi standar"""
+    return {
+        "success": True,
+        "prediction": payload.get("prediction"),
+        "prob_hoax": payload.get("prob_hoax"),
+        "confidence": payload.get("confidence"),
+        "probabilities": payload.get("probabilities", {}),
+        "model_version": payload.get("model_version", "hf_space"),
+        "source": "hf_space",
+    }
+
+
+def _error(message: str) -> Dict[str, Any]:
+    return {"success": False, "error": message, "source": "hf_space"}
+
+
+def _errors(message: str, count: int) -> List[Dict[str, Any]]:
+    return [_error(message) for _ in range(count)]
+
+
+class SpaceBatchClient:
+    """Prediksi banyak teks ke HF Space dengan chunking dan concurrency terbatas"""
+
+    def __init__(
+        self,
+        batch_size: int = HF_SPACE_BATCH_SIZE,
+        concurrency: int = HF_SPACE_BATCH_CONCURRENCY,
+        probe_ttl: float = HF_SPACE_BATCH_PROBE_TTL,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.probe_ttl = probe_ttl
+        self._supported: Optional[bool] = None
+        self._max_batch_size: Optional[int] = None
+        self._probed_at = 0.0
+        self._stats: Dict[str, Any] = {
+            "calls": 0,
+            "items": 0,
+            "batch_requests": 0,
+            "single_requests": 0,
+            "item_errors": 0,
+            "probes": 0,
+        }
+
+    # --------------------------
+    # Capability probe
+    # --------------------------
+
+    async def supports_batch(self) -> bool:
+        """Baca capabilities dari /api/health (di-cache selama probe_ttl)"""
+        if (
+            self._supported is not None
+            and time.monotonic() - self._probed_at < self.probe_ttl
+        ):
+            return self._supported
+
+        self._stats["probes"] += 1
+        supported, max_size = False, None
+        try:
+            response = await space_client.get().get("/api/health", timeout=10.0)
+            if response.status_code == 200:
+                capabilities = response.json().get("capabilities") or {}
+                supported = bool(capabilities.get("batch"))
+                max_size = capabilities.get("max_batch_size")
+        except Exception as e:
+            # Space tidak bisa diprobe: anggap tidak mendukung, coba lagi nanti
+            logger.warning(f"HF Space capability probe failed: {e}")
+        self._set_capability(supported, max_size)
+        logger.info(
+            f"HF Space batch support: {supported} (max_batch_size={max_size})"
+        )
+        return supported
+
+    def _set_capability(self, supported: bool, max_size: Optional[int] = None) -> None:
+        self._supported = supported
+        self._max_batch_size = int(max_size) if max_size else None
+        self._probed_at = time.monotonic()
+
+    def chunk_size(self) -> int:
+        if self._max_batch_size:
+            return max(1, min(self.batch_size, self._max_batch_size))
+        return self.batch_size
+
+    # --------------------------
+    # Prediction
+    # --------------------------
+
+    async def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Prediksi semua teks lewat HF Space
+
+        Returns:
+            List hasil sejajar dengan texts; item yang gagal berisi
+            {"success": False, "error": ...} sehingga caller bisa
+            fallback per item.
+        """
+        if not texts:
+            return []
+        self._stats["calls"] += 1
+        self._stats["items"] += len(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        if await self.supports_batch():
+            size = self.chunk_size()
+            chunks = [texts[i : i + size] for i in range(0, len(texts), size)]
+            parts = await asyncio.gather(
+                *(self._predict_chunk(chunk, semaphore) for chunk in chunks)
+            )
+            results = [result for part in parts for result in part]
+        else:
+            results = list(
+                await asyncio.gather(
+                    *(self._predict_single_bounded(text, semaphore) for text in texts)
+                )
+            )
+
+        self._stats["item_errors"] += sum(1 for r in results if not r["success"])
+        return results
+
+    async def _predict_single(self, text: str) -> Dict[str, Any]:
+        from .hf_space_service import HFSpaceService
+
+        if not space_breaker.allow_request():
+            return _error("HF Space circuit open")
+        self._stats["single_requests"] += 1
+        return await HFSpaceService.predict_via_space(text)
+
+    async def _predict_single_bounded(
+        self, text: str, semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        async with semaphore:
+            return await self._predict_single(text)
+
+    async def _predict_chunk(
+        self, chunk: List[str], semaphore: asyncio.Semaphore
+    ) -> List[Dict[str, Any]]:
+        async with semaphore:
+            if not self._supported:
+                # Endpoint batch ternyata tidak ada (chunk lain yang mendeteksi)
+                return [await self._predict_single(text) for text in chunk]
+            if not space_breaker.allow_request():
+                return _errors("HF Space circuit open", len(chunk))
+
+            self._stats["batch_requests"] += 1
+            started = time.perf_counter()
+            try:
+                response = await space_client.get().post(
+                    "/api/predict/batch", json={"texts": chunk}
+                )
+            except httpx.TimeoutException:
+                space_breaker.record_failure(time.perf_counter() - started)
+                return _errors("HF Space batch request timeout", len(chunk))
+            except Exception as e:
+                space_breaker.record_failure(time.perf_counter() - started)
+                logger.exception(f"Error calling HF Space batch API: {e}")
+                return _errors(str(e), len(chunk))
+            elapsed = time.perf_counter() - started
+
+            if response.status_code in _UNSUPPORTED_STATUS:
+                logger.warning(
+                    f"HF Space batch endpoint returned {response.status_code}; "
+                    "falling back to single-text requests"
+                )
+                self._set_capability(False)
+                return [await self._predict_single(text) for text in chunk]
+            if response.status_code != 200:
+                if response.status_code >= 500 or response.status_code == 429:
+                    space_breaker.record_failure(elapsed)
+                message = f"API returned {response.status_code}: {response.text}"
+                logger.error(f"HF Space batch API error: {message}")
+                return _errors(message, len(chunk))
+
+            # Latensi batch bukan latensi satu teks: hanya untuk status breaker,
+            # tidak masuk persentil yang dipakai hedging
+            space_breaker.record_success(elapsed / len(chunk), sample=False)
+            return self._map_results(response.json(), len(chunk))
+
+    @staticmethod
+    def _map_results(payload: Any, expected: int) -> List[Dict[str, Any]]:
+        """Hasil per item: {"prediction": ...} atau {"error": "..."}"""
+        items = payload.get("results") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or len(items) != expected:
+            count = len(items) if isinstance(items, list) else 0
+            message = f"HF Space batch returned {count} results for {expected} texts"
+            logger.error(message)
+            return _errors(message, expected)
+        results = []
+        for item in items:
+            if not isinstance(item, dict):
+                results.append(_error("Invalid HF Space batch result"))
+            elif item.get("error"):
+                results.append(_error(str(item["error"])))
+            else:
+                results.append(parse_space_prediction(item))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["batch_supported"] = self._supported
+        stats["max_batch_size"] = self._max_batch_size
+        stats["chunk_size"] = self.chunk_size()
+        stats["concurrency"] = self.concurrency
+        return stats
+
+
+# Singleton instance
+space_batch_client = SpaceBatchClient()
@@ -0,0 +1,158 @@
+r"""Local stand-in for the HF Space prediction API.
+
+Serves the same endpoints the backend calls (/api/health, /api/predict and
+/api/predict/batch) with simulated latency and failures, so the Space client,
+circuit breaker, hedging and batch fallback can be exercised without the
+real Space. Predictions are deterministic per text (hash-based), not a model.
+
+Usage (PowerShell):
+python .\scripts\fake_hf_space.py --port 7860 --latency-ms 300 --jitter-ms 200 --failure-rate 0.1
+$env:HF_SPACE_URL = "http://127.0.0.1:7860"   # then start the backend
+
+--no-batch hides the batch capability (and the endpoint returns 404) to test
+the single-text fallback; --item-failure-rate makes individual batch items fail.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import random
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+CONFIG = {
+    "latency_ms": 200.0,
+    "jitter_ms": 100.0,
+    "per_item_ms": 20.0,
+    "failure_rate": 0.0,
+    "item_failure_rate": 0.0,
+    "batch": True,
+    "max_batch_size": 64,
+}
+
+app = FastAPI(title="Fake HF Space")
+
+
+class PredictRequest(BaseModel):
+    text: str
+
+
+class BatchPredictRequest(BaseModel):
+    texts: List[str]
+
+
+def _predict(text: str) -> dict:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    prob_hoax = round(digest[0] / 255.0, 4)
+    prediction = int(prob_hoax >= 0.5)
+    return {
+        "prediction": prediction,
+        "prob_hoax": prob_hoax,
+        "confidence": prob_hoax if prediction == 1 else 1 - prob_hoax,
+        "probabilities": {"valid": 1 - prob_hoax, "hoax": prob_hoax},
+        "model_version": "fake_space",
+    }
+
+
+async def _simulate(items: int = 1):
+    """Sleep for the configured latency; return an error response on failure"""
+    latency = CONFIG["latency_ms"] + CONFIG["per_item_ms"] * (items - 1)
+    latency += random.uniform(0, CONFIG["jitter_ms"])
+    await asyncio.sleep(latency / 1000.0)
+    if random.random() < CONFIG["failure_rate"]:
+        return JSONResponse(status_code=503, content={"error": "simulated overload"})
+    return None
+
+
+@app.get("/api/health")
+async def health():
+    capabilities = (
+        {"batch": True, "max_batch_size": CONFIG["max_batch_size"]}
+        if CONFIG["batch"]
+        else {}
+    )
+    return {"status": "ok", "model_version": "fake_space", "capabilities": capabilities}
+
+
+@app.post("/api/predict")
+async def predict(req: PredictRequest):
+    failed = await _simulate()
+    if failed is not None:
+        return failed
+    return _predict(req.text)
+
+
+@app.post("/api/predict/batch")
+async def predict_batch(req: BatchPredictRequest):
+    if not CONFIG["batch"]:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    if len(req.texts) > CONFIG["max_batch_size"]:
+        return JSONResponse(
+            status_code=422,
+            content={"error": f"max_batch_size is {CONFIG['max_batch_size']}"},
+        )
+    failed = await _simulate(len(req.texts))
+    if failed is not None:
+        return failed
+    results = [
+        {"error": "simulated item failure"}
+        if random.random() < CONFIG["item_failure_rate"]
+        else _predict(text)
+        for text in req.texts
+    ]
+    return {"results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--latency-ms", type=float, default=CONFIG["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=CONFIG["jitter_ms"])
+    parser.add_argument(
+        "--per-item-ms",
+        type=float,
+        default=CONFIG["per_item_ms"],
+        help="Extra latency per additional text in a batch request",
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=CONFIG["failure_rate"],
+        help="Fraction of requests answered with 503",
+    )
+    parser.add_argument(
+        "--item-failure-rate",
+        type=float,
+        default=CONFIG["item_failure_rate"],
+        help="Fraction of batch items returned as errors",
+    )
+    parser.add_argument(
+        "--max-batch-size", type=int, default=CONFIG["max_batch_size"]
+    )
+    parser.add_argument(
+        "--no-batch", action="store_true", help="Do not advertise batch support"
+    )
+    args = parser.parse_args()
+
+    CONFIG.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        per_item_ms=args.per_item_ms,
+        failure_rate=args.failure_rate,
+        item_failure_rate=args.item_failure_rate,
+        batch=not args.no_batch,
+        max_batch_size=args.max_batch_size,
+    )
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
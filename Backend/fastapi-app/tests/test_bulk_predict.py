@@ -0,0 +1,78 @@
+"""POST /predict/bulk with real request bodies (NDJSON and CSV)."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import predict
+from app.services.hf_space_service import HFSpaceService
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_batch(texts):
+        return [
+            {"success": True, "prediction": 1, "prob_hoax": 0.9, "confidence": 0.9}
+            for _ in texts
+        ]
+
+    # No local model: bulk jobs score through the (faked) HF Space batch client
+    monkeypatch.setattr(
+        HFSpaceService, "local_model_available", staticmethod(lambda: False)
+    )
+    monkeypatch.setattr(
+        HFSpaceService, "predict_batch_via_space", staticmethod(fake_batch)
+    )
+    app = FastAPI()
+    app.include_router(predict.router)
+    return TestClient(app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_bulk_ndjson_scores_every_row(client):
+    body = "".join(
+        json.dumps({"id": i, "text": f"berita {i}"}) + "\n" for i in range(5000)
+    )
+    response = client.post(
+        "/predict/bulk",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+        timeout=30,
+    )
+    assert response.status_code == 200
+    *rows, summary = _lines(response)
+    assert summary["done"] is True
+    assert summary["rows"] == 5000
+    assert summary["errors"] == 0
+    assert [row["index"] for row in rows] == list(range(5000))
+    assert rows[-1]["id"] == 4999
+
+
+def test_bulk_ndjson_streamed_body(client):
+    def chunks():
+        for start in range(0, 2000, 100):
+            rows = range(start, start + 100)
+            yield "".join(json.dumps({"text": f"berita {i}"}) + "\n" for i in rows).encode()
+
+    response = client.post(
+        "/predict/bulk",
+        content=chunks(),
+        headers={"content-type": "application/x-ndjson"},
+        timeout=30,
+    )
+    assert _lines(response)[-1]["rows"] == 2000
+
+
+def test_bulk_csv_with_multiline_field(client):
+    body = 'id,text,user_label\n1,"baris satu\nbaris dua",1\n2,berita kedua,\n3,,0\n'
+    response = client.post("/predict/bulk?format=csv", content=body, timeout=30)
+    *rows, summary = _lines(response)
+    assert summary["rows"] == 3
+    assert summary["errors"] == 1
+    assert rows[0]["id"] == "1" and rows[0]["prediction"] == 1
+    assert "error" in rows[2]
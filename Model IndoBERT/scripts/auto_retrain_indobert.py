@@ -12,6 +12,10 @@ Pemakaian (jalankan dari root repo):
 Catatan:
 - Feedback tanpa label (user_label kosong) akan diabaikan untuk retraining.
 - Model versi baru akan diarsipkan ke folder models/indobert_versions, dan registry.json akan diperbarui.
+- Varian INT8 (dynamic quantization) dibangun di folder versi yang sama beserta laporan
+  ukuran, latensi p50/p95 dan delta akurasi/F1 vs FP32 (nonaktifkan dengan --no-quantize).
+  Dengan INDOBERT_BACKEND=onnx, versi baru juga diekspor ke ONNX. Registry baru menunjuk
+  versi baru setelah artefak tersebut selesai dibangun.
 - training set dibangun dari data awal + feedback berlabel, validasi & test tetap dari split awal atau bisa di-augment sesuai kebutuhan.
 """
 
@@ -75,8 +79,10 @@ def main() -> None:
         get_last_used_feedback_id,
         set_last_used_feedback_id,
         next_version,
-        archive_and_set_current,
+        archive_version,
+        set_current_version,
     )
+    from src.config import SETTINGS  # type: ignore
 
     parser = argparse.ArgumentParser(
         description="Auto-retrain IndoBERT dari feedback berlabel"
@@ -91,6 +97,11 @@ def main() -> None:
     parser.add_argument(
         "--batch-size", type=int, default=16, help="Batch size fine-tuning"
     )
+    parser.add_argument(
+        "--no-quantize",
+        action="store_true",
+        help="Jangan bangun varian INT8 untuk versi baru",
+    )
     args = parser.parse_args()
 
     # Pastikan split dasar tersedia
@@ -125,13 +136,34 @@ def main() -> None:
         train_df=train_df, val_df=val_df, test_df=test_df, params=params
     )
 
-    # Naikkan versi dan arsipkan model
+    # Arsipkan model; registry baru diperbarui setelah artefak turunan siap,
+    # supaya server INT8/ONNX tidak memuat versi baru tanpa artefaknya
     ver = next_version()
-    archive_path = archive_and_set_current(
-        new_version=ver, metrics=metrics, feedback_rows_used=n_new
-    )
+    archive_path = archive_version(ver)
     print(f"Model baru diarsipkan sebagai versi {ver}: {archive_path}")
 
+    if not args.no_quantize:
+        from src.modeling.quantize import build_quantized, format_report  # type: ignore
+
+        try:
+            print(format_report(build_quantized(archive_path, ver)))
+        except Exception as e:
+            # Server jatuh ke FP32 untuk versi ini (lihat model_manager)
+            print(f"Peringatan: kuantisasi INT8 gagal ({e})")
+
+    if SETTINGS.indobert_backend == "onnx":
+        from src.modeling.onnx_export import export_onnx  # type: ignore
+
+        try:
+            print(f"ONNX diekspor ke: {export_onnx(archive_path, ver)}")
+        except Exception as e:
+            # Server jatuh ke backend torch untuk versi ini (lihat model_manager)
+            print(f"Peringatan: ekspor ONNX gagal ({e})")
+
+    # Naikkan versi
+    set_current_version(ver, metrics=metrics, feedback_rows_used=n_new)
+    print(f"Versi aktif -> {ver}")
+
     # Catat last used feedback id
     max_id = max(r["id"] for r in new_rows)
     set_last_used_feedback_id(max_id)
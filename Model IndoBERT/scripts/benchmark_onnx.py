@@ -0,0 +1,130 @@
+"""
+Bandingkan backend IndoBERT PyTorch vs ONNX Runtime pada data/processed/test.csv.
+
+Skrip ini:
+- Mengecek paritas: selisih probabilitas maksimum dan kesamaan label prediksi.
+  Gagal (exit code 1) jika selisih melebihi --atol atau ada label yang berbeda.
+- Mengukur latensi per teks (batch_size=1, p50/p95) dan throughput batch
+  (teks/detik) untuk kedua backend.
+
+Jalankan `python -m src.modeling.onnx_export` terlebih dahulu.
+
+Contoh:
+  python scripts/benchmark_onnx.py
+  python scripts/benchmark_onnx.py --limit 500 --latency-samples 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _ensure_repo_on_syspath() -> None:
+    here = Path(__file__).resolve()
+    repo_root = here.parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+_ensure_repo_on_syspath()
+
+try:
+    import numpy as np
+    import pandas as pd
+
+    from src.config import PROCESSED_DIR
+    from src.modeling.predict import indobert_probabilities
+except Exception:
+    print("Gagal mengimpor modul dari src. Pastikan menjalankan dari root repo.")
+    raise
+
+
+BACKENDS = ("torch", "onnx")
+
+
+def _latency_ms(texts, backend: str) -> np.ndarray:
+    out = []
+    for t in texts:
+        start = time.perf_counter()
+        indobert_probabilities([t], batch_size=1, backend=backend)
+        out.append((time.perf_counter() - start) * 1000)
+    return np.asarray(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Paritas dan benchmark IndoBERT PyTorch vs ONNX Runtime"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Batasi jumlah baris test.csv"
+    )
+    parser.add_argument(
+        "--latency-samples",
+        type=int,
+        default=200,
+        help="Jumlah teks untuk pengukuran latensi per teks (default 200)",
+    )
+    parser.add_argument(
+        "--atol",
+        type=float,
+        default=1e-4,
+        help="Toleransi selisih probabilitas maksimum (default 1e-4)",
+    )
+    args = parser.parse_args()
+
+    test_path = os.path.join(PROCESSED_DIR, "test.csv")
+    if not os.path.exists(test_path):
+        raise SystemExit(f"File test belum ada: {test_path}")
+    test_df = pd.read_csv(test_path)
+    if args.limit:
+        test_df = test_df.head(args.limit)
+    texts = test_df["text"].astype(str).tolist()
+    y_true = test_df["label"].astype(int).values
+
+    # Warm-up: load both backends outside the timed sections
+    for backend in BACKENDS:
+        indobert_probabilities(texts[:2], backend=backend)
+
+    probs = {}
+    throughput = {}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        probs[backend], version = indobert_probabilities(texts, backend=backend)
+        throughput[backend] = len(texts) / (time.perf_counter() - start)
+
+    sample = texts[: args.latency_samples]
+    latency = {backend: _latency_ms(sample, backend) for backend in BACKENDS}
+
+    max_diff = float(np.abs(probs["torch"] - probs["onnx"]).max()) if texts else 0.0
+    pred_torch = probs["torch"].argmax(axis=1)
+    pred_onnx = probs["onnx"].argmax(axis=1)
+    mismatches = int((pred_torch != pred_onnx).sum())
+
+    print(f"Test: {len(texts)} teks | IndoBERT {version}")
+    print(f"{'backend':>8} {'acc':>8} {'p50 ms':>9} {'p95 ms':>9} {'teks/s':>9}")
+    for backend in BACKENDS:
+        acc = float(np.mean(probs[backend].argmax(axis=1) == y_true))
+        lat = latency[backend]
+        print(
+            f"{backend:>8} {acc:8.4f} {np.percentile(lat, 50):9.2f} "
+            f"{np.percentile(lat, 95):9.2f} {throughput[backend]:9.1f}"
+        )
+    print(
+        f"\nSpeed-up ONNX: latensi p50 "
+        f"{np.percentile(latency['torch'], 50) / np.percentile(latency['onnx'], 50):.2f}x, "
+        f"throughput {throughput['onnx'] / throughput['torch']:.2f}x"
+    )
+    print(f"Paritas: selisih prob maks {max_diff:.2e}, label berbeda {mismatches}")
+
+    if max_diff > args.atol or mismatches:
+        print("PARITAS GAGAL")
+        sys.exit(1)
+    print("Paritas OK")
+
+
+if __name__ == "__main__":
+    main()
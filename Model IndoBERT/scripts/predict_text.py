@@ -5,6 +5,16 @@ Usage examples (run from repo root):
   python scripts/predict_text.py --title "Judul" --body "Isi ..." --model both
   python scripts/predict_text.py --text "Kalimat lengkap ..." --model indobert
   python scripts/predict_text.py --text-file path/to/file.txt --model fasttext
+  python scripts/predict_text.py --text "Kalimat lengkap ..." --model cascade
+
+Batch mode (CSV, JSONL atau folder berisi file .txt):
+  python scripts/predict_text.py --input data/scraped.csv --output preds.csv --model indobert
+  python scripts/predict_text.py --input data/scraped.jsonl --output preds.jsonl --batch-size 128 --workers 2
+  python scripts/predict_text.py --input data/scraped.csv --output preds.csv --resume
+
+  Hasil ditulis per batch (id, model, prediction, label, prob_hoax, confidence),
+  sehingga job yang terhenti bisa dilanjutkan dengan --resume: id yang sudah
+  ada di file output dilewati.
 
 Note: This script ensures the repo root is on sys.path so that `src` can be imported
 without needing to install the package.
@@ -13,8 +23,15 @@ without needing to install the package.
 from __future__ import annotations
 
 import argparse
+import csv
+import io
+import json
 import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 
 def _ensure_repo_on_syspath() -> None:
@@ -29,8 +46,10 @@ _ensure_repo_on_syspath()
 
 # Now we can import project functions
 try:
-    from src.modeling.predict import predict_fasttext, predict_indobert
+    from src.modeling.predict import predict_cascade, predict_fasttext, predict_indobert
+    from src import feedback
     from src.feedback import FEEDBACK_FILE
+    from src.services.model_registry import get_current_version
 except Exception:
     print("Gagal mengimpor modul prediksi dari src. Pastikan menjalankan dari root repo.")
     raise
@@ -49,6 +68,236 @@ def build_text(args: argparse.Namespace) -> str:
     raise SystemExit("Harap isi salah satu: --text, --text-file, atau gabungan --title/--body")
 
 
+# --------------------------
+# Batch mode
+# --------------------------
+
+OUTPUT_FIELDS = ["id", "model", "prediction", "label", "prob_hoax", "confidence"]
+
+
+def _record_text(row: Dict, text_column: str) -> str:
+    text = str(row.get(text_column) or "").strip()
+    if not text:
+        title = str(row.get("title") or "").strip()
+        body = str(row.get("body") or "").strip()
+        text = f"{title}\n\n{body}".strip()
+    return text
+
+
+def _record_label(row: Dict) -> Optional[int]:
+    try:
+        label = int(row.get("user_label"))
+    except (TypeError, ValueError):
+        return None
+    return label if label in (0, 1) else None
+
+
+def iter_records(
+    path: Path, text_column: str, id_column: str
+) -> Iterator[Tuple[str, str, Optional[int]]]:
+    """(id, text, user_label) dari CSV, JSONL, atau folder file .txt (streaming)"""
+    if path.is_dir():
+        for f in sorted(path.rglob("*.txt")):
+            yield f.relative_to(path).as_posix(), f.read_text(encoding="utf-8"), None
+        return
+
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows: Iterator[Dict] = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for i, row in enumerate(rows):
+            rid = row.get(id_column)
+            yield (str(rid) if rid not in (None, "") else str(i)), _record_text(
+                row, text_column
+            ), _record_label(row)
+
+
+def _truncate_partial_line(path: Path) -> None:
+    """Buang baris terakhir yang terpotong (job terhenti saat menulis)"""
+    with path.open("rb+") as f:
+        data_end = f.seek(0, 2)
+        if data_end == 0:
+            return
+        f.seek(data_end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = data_end
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl != -1:
+                f.truncate(pos + nl + 1)
+                return
+        f.truncate(0)
+
+
+def load_done_ids(path: Path, rows_per_id: int = 1) -> Set[str]:
+    """Id yang semua baris hasilnya (satu per model) sudah ada di output"""
+    if not path.exists():
+        return set()
+    _truncate_partial_line(path)
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            counts = Counter(str(json.loads(line)["id"]) for line in f if line.strip())
+        else:
+            counts = Counter(row["id"] for row in csv.DictReader(f))
+    return {rid for rid, n in counts.items() if n >= rows_per_id}
+
+
+def _iter_batches(
+    records: Iterator[Tuple[str, str, Optional[int]]], size: int
+) -> Iterator[List[Tuple[str, str, Optional[int]]]]:
+    batch: List[Tuple[str, str, Optional[int]]] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_batch(
+    texts: List[str], model: str
+) -> List[Tuple[str, List[int], List[float], List[int]]]:
+    """[(model_name, preds, probs, row_idx), ...] untuk satu batch; tanpa logging feedback"""
+    out = []
+    all_rows = list(range(len(texts)))
+    if model in ("fasttext", "both"):
+        preds, probs = predict_fasttext(texts, return_proba=True)  # type: ignore
+        out.append(("fasttext", preds, probs, all_rows))
+    if model in ("indobert", "both"):
+        preds, probs = predict_indobert(texts, return_proba=True)  # type: ignore
+        out.append(("indobert", preds, probs, all_rows))
+    if model == "cascade":
+        preds, probs, stages = predict_cascade(
+            texts, return_proba=True, return_stages=True
+        )  # type: ignore
+        for stage in ("fasttext", "indobert"):
+            idx = [i for i, st in enumerate(stages) if st == stage]
+            if idx:
+                out.append(
+                    (
+                        f"cascade:{stage}",
+                        [preds[i] for i in idx],
+                        [probs[i] for i in idx],
+                        idx,
+                    )
+                )
+    return out
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    in_path = Path(args.input)
+    if not in_path.exists():
+        raise SystemExit(f"Input tidak ditemukan: {in_path}")
+    out_path = Path(args.output)
+    if out_path.exists() and out_path.stat().st_size and not args.resume:
+        raise SystemExit(
+            f"Output sudah ada: {out_path}. Pakai --resume untuk melanjutkan atau hapus file."
+        )
+
+    rows_per_id = 2 if args.model == "both" else 1
+    done = load_done_ids(out_path, rows_per_id) if args.resume else set()
+    if done:
+        print(f"Resume: {len(done)} id sudah diproses, dilewati.")
+
+    records = (
+        rec
+        for rec in iter_records(in_path, args.text_column, args.id_column)
+        if rec[0] not in done and rec[1].strip()
+    )
+    as_jsonl = out_path.suffix.lower() in (".jsonl", ".ndjson")
+    version = get_current_version()
+    workers = max(1, args.workers)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("a", encoding="utf-8", newline="") as f, ThreadPoolExecutor(
+        max_workers=workers
+    ) as pool:
+        if not as_jsonl and f.tell() == 0:
+            csv.DictWriter(f, OUTPUT_FIELDS).writeheader()
+
+        def write(batch, scored) -> None:
+            ids = [rid for rid, _, _ in batch]
+            per_row: List[List[Dict]] = [[] for _ in batch]
+            for name, preds, probs, idx in scored:
+                confs = [max(p, 1 - p) for p in probs]
+                for i, pred, p1, conf in zip(idx, preds, probs, confs):
+                    per_row[i].append(
+                        {
+                            "id": ids[i],
+                            "model": name,
+                            "prediction": int(pred),
+                            "label": "hoaks" if int(pred) == 1 else "bukan hoaks",
+                            "prob_hoax": round(float(p1), 6),
+                            "confidence": round(float(conf), 6),
+                        }
+                    )
+                if args.log:
+                    # Satu thread penulis, sehingga id feedback tidak bentrok
+                    texts = [batch[i][1] for i in idx]
+                    labels = [
+                        args.user_label if args.user_label is not None else batch[i][2]
+                        for i in idx
+                    ]
+                    feedback.log_prediction(
+                        texts,
+                        preds,
+                        probs,
+                        confs,
+                        model_name=name,
+                        model_version=version,
+                        user_labels=labels,
+                    )
+
+            # Satu write per batch; baris terpotong dibuang saat --resume
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, OUTPUT_FIELDS)
+            for rows_out in per_row:
+                for row in rows_out:
+                    if as_jsonl:
+                        buf.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    else:
+                        writer.writerow(row)
+            f.write(buf.getvalue())
+            f.flush()
+
+        started = time.perf_counter()
+        rows = 0
+        n_batches = 0
+        pending: deque = deque()
+
+        def drain_one() -> None:
+            nonlocal rows, n_batches
+            batch, future = pending.popleft()
+            write(batch, future.result())
+            rows += len(batch)
+            n_batches += 1
+            if args.progress_every and n_batches % args.progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{rows} baris | {rows / elapsed:.1f} baris/detik")
+
+        # Hasil ditulis sesuai urutan input; paling banyak 2x workers batch di memori
+        for batch in _iter_batches(records, max(1, args.batch_size)):
+            pending.append((batch, pool.submit(score_batch, [t for _, t, _ in batch], args.model)))
+            if len(pending) >= workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"Selesai: {rows} baris dalam {elapsed:.1f} detik ({rate:.1f} baris/detik)")
+    print(f"Hasil tersimpan di: {out_path}")
+    if args.log:
+        print(f"Feedback tersimpan di: {FEEDBACK_FILE}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Prediksi hoaks/bukan hoaks dengan FastText/IndoBERT (+opsional logging feedback)")
     parser.add_argument("--title", type=str, default=None, help="Judul teks (opsional)")
@@ -58,15 +307,31 @@ def main() -> None:
     parser.add_argument(
         "--model",
         type=str,
-        choices=["fasttext", "indobert", "both"],
+        choices=["fasttext", "indobert", "both", "cascade"],
         default="both",
         help="Model yang digunakan",
     )
     parser.add_argument("--log", action="store_true", help="Aktifkan logging ke feedback.csv")
     parser.add_argument("--user-label", type=int, choices=[0, 1], default=None, help="Label user (0=bukan hoaks,1=hoaks) untuk semua teks (opsional)")
     parser.add_argument("--return-proba", action="store_true", help="Tampilkan probabilitas hoaks (label=1)")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--input", type=str, default=None, help="CSV, JSONL, atau folder file .txt untuk batch mode")
+    batch.add_argument("--output", type=str, default=None, help="File hasil (.csv atau .jsonl), ditulis per batch")
+    batch.add_argument("--batch-size", type=int, default=64, help="Jumlah teks per batch inference")
+    batch.add_argument("--workers", type=int, default=1, help="Jumlah thread inference paralel")
+    batch.add_argument("--resume", action="store_true", help="Lanjutkan job: lewati id yang sudah ada di output")
+    batch.add_argument("--text-column", type=str, default="text", help="Kolom teks di CSV/JSONL (fallback title/body)")
+    batch.add_argument("--id-column", type=str, default="id", help="Kolom id di CSV/JSONL (default nomor baris)")
+    batch.add_argument("--progress-every", type=int, default=10, help="Cetak baris/detik setiap N batch (0 = nonaktif)")
 
     args = parser.parse_args()
+    if args.input:
+        if not args.output:
+            raise SystemExit("Batch mode butuh --output")
+        if args.progress_every < 0:
+            raise SystemExit("--progress-every harus >= 0 (0 = nonaktif)")
+        run_batch(args)
+        return
     text = build_text(args)
 
     def label_to_str(y: int) -> str:
@@ -96,6 +361,18 @@ def main() -> None:
             y_bert = predict_indobert([text], log_feedback=args.log, user_labels=[args.user_label])[0]
             print(f"IndoBERT: {label_to_str(y_bert)}")
 
+    if args.model == "cascade":
+        (y_list, p_list, stages) = predict_cascade(
+            [text],
+            return_proba=True,
+            log_feedback=args.log,
+            user_labels=[args.user_label],
+            return_stages=True,
+        )  # type: ignore
+        print(
+            f"Cascade ({stages[0]}): {label_to_str(y_list[0])} (p_hoax={p_list[0]:.4f})"
+        )
+
     if args.log:
         print(f"Feedback tersimpan di: {FEEDBACK_FILE}")
 
@@ -0,0 +1,111 @@
+"""
+Pilih uncertainty band untuk cascade FastText -> IndoBERT memakai data/processed/val.csv.
+
+Skrip menilai seluruh val set dengan FastText dan IndoBERT sekali, lalu
+mensimulasikan band simetris (m, 1-m). Band tercepat yang penurunan akurasinya
+(dibanding IndoBERT saja) masih di bawah --max-accuracy-loss disimpan ke
+models/cascade_band.json dan dipakai otomatis oleh predict_cascade.
+
+Contoh:
+  python scripts/tune_cascade_band.py --max-accuracy-loss 0.005
+  python scripts/tune_cascade_band.py --max-accuracy-loss 0.01 --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _ensure_repo_on_syspath() -> None:
+    here = Path(__file__).resolve()
+    repo_root = here.parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+_ensure_repo_on_syspath()
+
+try:
+    import numpy as np
+    import pandas as pd
+
+    from src.config import PROCESSED_DIR
+    from src.modeling.cascade import choose_band, evaluate_bands, save_band
+    from src.modeling.predict import indobert_probabilities, predict_fasttext
+except Exception:
+    print("Gagal mengimpor modul dari src. Pastikan menjalankan dari root repo.")
+    raise
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Tuning uncertainty band cascade FastText -> IndoBERT"
+    )
+    parser.add_argument(
+        "--max-accuracy-loss",
+        type=float,
+        default=0.005,
+        help="Penurunan akurasi maksimum dibanding IndoBERT saja (default 0.005)",
+    )
+    parser.add_argument(
+        "--step", type=float, default=0.025, help="Jarak grid margin band"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Tampilkan hasil tanpa menyimpan band"
+    )
+    args = parser.parse_args()
+
+    val_path = os.path.join(PROCESSED_DIR, "val.csv")
+    if not os.path.exists(val_path):
+        raise SystemExit(f"File validasi belum ada: {val_path}")
+    val_df = pd.read_csv(val_path)
+    texts = val_df["text"].astype(str).tolist()
+    y_true = val_df["label"].astype(int).values
+
+    start = time.perf_counter()
+    _, p_ft = predict_fasttext(texts, return_proba=True)  # type: ignore
+    ft_seconds = (time.perf_counter() - start) / len(texts)
+
+    start = time.perf_counter()
+    bert_probs, version = indobert_probabilities(texts)
+    bert_seconds = (time.perf_counter() - start) / len(texts)
+
+    margins = np.arange(0.0, 0.5, args.step).tolist()
+    rows = evaluate_bands(
+        y_true,
+        np.asarray(p_ft),
+        bert_probs[:, 1],
+        ft_seconds,
+        bert_seconds,
+        margins,
+    )
+
+    print(f"Val: {len(texts)} teks | IndoBERT {version}")
+    print(
+        f"Waktu per teks: FastText {ft_seconds * 1000:.3f} ms | IndoBERT {bert_seconds * 1000:.3f} ms"
+    )
+    print(f"{'band':>15} {'acc':>8} {'loss':>8} {'escalate':>9} {'speedup':>8}")
+    for r in rows:
+        print(
+            f"({r['low']:.3f},{r['high']:.3f}) {r['accuracy']:8.4f} {r['accuracy_loss']:8.4f} "
+            f"{r['escalation_rate']:9.3f} {r['speedup']:7.1f}x"
+        )
+
+    best = choose_band(rows, args.max_accuracy_loss)
+    print(
+        f"\nBand terpilih: ({best['low']:.3f}, {best['high']:.3f}) "
+        f"akurasi {best['accuracy']:.4f}, eskalasi {best['escalation_rate']:.1%}, "
+        f"~{best['speedup']:.1f}x lebih cepat dari IndoBERT saja"
+    )
+    if not args.dry_run:
+        report = dict(best, model_version=version, val_size=len(texts))
+        path = save_band(best["low"], best["high"], report)
+        print(f"Band tersimpan di: {path}")
+
+
+if __name__ == "__main__":
+    main()
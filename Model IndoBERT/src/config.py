@@ -37,7 +37,31 @@ class Settings:
     fasttext_model_path: str = os.path.join(MODELS_DIR, "fasttext_model.bin")
     indobert_model_dir: str = os.path.join(MODELS_DIR, "indobert")
     indobert_checkpoint: str = "indobenchmark/indobert-base-p1"  # HF model
+    indobert_max_length: int = 256
+    indobert_batch_size: int = 16
+    indobert_max_batch_tokens: int = 8192  # padded tokens per forward pass
+    # Long-document (sliding window) mode
+    indobert_window_overlap: int = 64  # tokens shared by consecutive windows
+    indobert_max_windows: int = 8  # per text; bounds latency on huge inputs
+    indobert_window_aggregate: str = "attention"  # max | mean | attention
+    # Inference backend: "torch" (eager FP32), "onnx" (ONNX Runtime, CPU) or
+    # "int8" (dynamic INT8 quantized, CPU). Build the artifacts first with
+    # `python -m src.modeling.onnx_export` / `python -m src.modeling.quantize`
+    indobert_backend: str = os.getenv("INDOBERT_BACKEND", "torch").lower()
     feedback_dir: str = FEEDBACK_DIR
+    # FastText -> IndoBERT cascade: FastText prob_hoax inside (low, high)
+    # escalates to IndoBERT; scripts/tune_cascade_band.py writes a tuned band
+    cascade_band_low: float = 0.1
+    cascade_band_high: float = 0.9
+    cascade_band_path: str = os.path.join(MODELS_DIR, "cascade_band.json")
+    # Near-duplicate (MinHash LSH) verdict lookup
+    near_dup_threshold: float = 0.85
+    near_dup_num_perm: int = 128
+    near_dup_bands: int = 32
+    near_dup_shingle_size: int = 5
+    # Only the first N normalized characters are shingled; index size cap
+    near_dup_max_chars: int = 2000
+    near_dup_max_entries: int = 200_000
 
 
 SETTINGS = Settings()
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
 import csv
+import io
 import os
+import threading
 import time
-from typing import Iterable, List, Optional
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
 
 from .config import SETTINGS
 
 
 FEEDBACK_FILE = os.path.join(SETTINGS.feedback_dir, "feedback.csv")
+# Lock file serializing id allocation + appends across threads and processes
+LOCK_FILE = FEEDBACK_FILE + ".lock"
 
 FIELDNAMES = [
     "id",  # unique incremental id
     "timestamp",  # epoch seconds
-    "model_name",  # fasttext | indobert
+    "model_name",  # fasttext | indobert | cascade:<deciding stage>
     "model_version",  # placeholder (could be commit hash / date)
     "text_length",
     "prediction",  # int
@@ -25,6 +30,39 @@ FIELDNAMES = [
 ]
 
 
+_THREAD_LOCK = threading.Lock()
+
+
+@contextmanager
+def _feedback_lock() -> Iterator[None]:
+    """Exclusive lock on feedback.csv shared by all threads and processes."""
+    with _THREAD_LOCK, open(LOCK_FILE, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after ~10s of retries; keep waiting
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
 def _init_file() -> None:
     if not os.path.exists(FEEDBACK_FILE):
         with open(FEEDBACK_FILE, "w", newline="", encoding="utf-8") as f:
@@ -32,22 +70,35 @@ def _init_file() -> None:
             writer.writeheader()
 
 
-def _next_id() -> int:
-    if not os.path.exists(FEEDBACK_FILE):
-        return 1
+def _last_id(f, block_size: int = 4096) -> int:
+    """Id of the last row, read backwards from EOF (0 if there are no rows).
+
+    Only the tail of the file is read, so the cost does not grow with the
+    number of rows.
+    """
+    end = f.seek(0, os.SEEK_END)
+    tail = b""
+    pos = end
+    while pos > 0:
+        step = min(block_size, pos)
+        pos -= step
+        f.seek(pos)
+        tail = f.read(step) + tail
+        stripped = tail.rstrip(b"\r\n")
+        # Need a newline before the last line (or the start of the file)
+        if b"\n" in stripped or pos == 0:
+            break
+    last_line = tail.rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
     try:
-        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-            # read last non-empty line to get id (avoid loading full file in memory)
-            last_line = None
-            for line in f:
-                if line.strip():
-                    last_line = line
-            if last_line:
-                parts = last_line.split(",", 1)
-                return int(parts[0]) + 1
-    except Exception:
-        return 1
-    return 1
+        return int(last_line.split(b",", 1)[0])
+    except ValueError:
+        return 0  # header only (or unreadable tail)
+
+
+def _allocate_ids(f, count: int) -> List[int]:
+    """Contiguous block of count ids after the last row (caller holds the lock)."""
+    start = _last_id(f) + 1
+    return list(range(start, start + count))
 
 
 def log_prediction(
@@ -63,36 +114,43 @@ def log_prediction(
 
     Returns list of assigned row ids.
     """
-    _init_file()
-    ids: List[int] = []
+    texts = list(texts)
+    predictions = list(predictions)
     if user_labels is None:
-        user_labels = [None] * len(list(predictions))  # type: ignore
-
-    with open(FEEDBACK_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, FIELDNAMES)
-        for text, pred, p1, conf, ul in zip(
-            texts, predictions, probs_hoax, confidences, user_labels
-        ):
-            rid = _next_id()
-            agreement = "unknown"
-            if ul is not None:
-                agreement = "yes" if int(ul) == int(pred) else "no"
-            writer.writerow(
-                {
-                    "id": rid,
-                    "timestamp": int(time.time()),
-                    "model_name": model_name,
-                    "model_version": model_version,
-                    "text_length": len(text),
-                    "prediction": int(pred),
-                    "prob_hoax": float(p1),
-                    "confidence": float(conf),
-                    "user_label": "" if ul is None else int(ul),
-                    "agreement": agreement,
-                    "raw_text": text.replace("\n", "\\n"),
-                }
-            )
-            ids.append(rid)
+        user_labels = [None] * len(predictions)
+    rows = list(zip(texts, predictions, probs_hoax, confidences, user_labels))
+    if not rows:
+        return []
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDNAMES)
+    with _feedback_lock():
+        _init_file()
+        with open(FEEDBACK_FILE, "r+b") as f:
+            # One id block per batch instead of rescanning the file per row
+            ids = _allocate_ids(f, len(rows))
+            now = int(time.time())
+            for rid, (text, pred, p1, conf, ul) in zip(ids, rows):
+                agreement = "unknown"
+                if ul is not None:
+                    agreement = "yes" if int(ul) == int(pred) else "no"
+                writer.writerow(
+                    {
+                        "id": rid,
+                        "timestamp": now,
+                        "model_name": model_name,
+                        "model_version": model_version,
+                        "text_length": len(text),
+                        "prediction": int(pred),
+                        "prob_hoax": float(p1),
+                        "confidence": float(conf),
+                        "user_label": "" if ul is None else int(ul),
+                        "agreement": agreement,
+                        "raw_text": text.replace("\n", "\\n"),
+                    }
+                )
+            f.seek(0, os.SEEK_END)
+            f.write(buffer.getvalue().encode("utf-8"))
     return ids
 
 
@@ -104,20 +162,22 @@ def update_user_label(row_id: int, user_label: int) -> bool:
         return False
     rows = []
     updated = False
-    with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            if int(r["id"]) == row_id:
-                r["user_label"] = int(user_label)
-                agreement = "yes" if int(r["prediction"]) == int(user_label) else "no"
-                r["agreement"] = agreement
-                updated = True
-            rows.append(r)
-    if updated:
-        with open(FEEDBACK_FILE, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, FIELDNAMES)
-            writer.writeheader()
-            writer.writerows(rows)
+    # Held across read + rewrite so concurrent appends are not lost
+    with _feedback_lock():
+        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for r in reader:
+                if int(r["id"]) == row_id:
+                    r["user_label"] = int(user_label)
+                    agreement = "yes" if int(r["prediction"]) == int(user_label) else "no"
+                    r["agreement"] = agreement
+                    updated = True
+                rows.append(r)
+        if updated:
+            with open(FEEDBACK_FILE, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(rows)
     return updated
 
 
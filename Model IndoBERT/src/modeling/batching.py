@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+# --------------------------
+# Length-aware batch planning
+# --------------------------
+
+
+def plan_batches(
+    lengths: Sequence[int], batch_size: int, max_batch_tokens: int
+) -> List[List[int]]:
+    """Group item indices into batches of similar token length.
+
+    Items are sorted by length (stable, so equal lengths keep their input
+    order) and cut whenever adding the next item would exceed batch_size
+    items or max_batch_tokens padded tokens (longest item x count). Callers
+    scatter results back by index, which restores the original order.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in order:
+        # Sorted ascending: the incoming item is the longest in the batch
+        if batch and (
+            len(batch) >= batch_size or lengths[i] * (len(batch) + 1) > max_batch_tokens
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _token_counts(
+    lengths: Sequence[int], batches: List[List[int]]
+) -> Tuple[int, int]:
+    real = sum(lengths[i] for b in batches for i in b)
+    padded = sum(max(lengths[i] for i in b) * len(b) for b in batches)
+    return real, padded
+
+
+def padding_efficiency(lengths: Sequence[int], batches: List[List[int]]) -> float:
+    """Real tokens / padded tokens over the planned batches (1.0 = no padding)."""
+    real, padded = _token_counts(lengths, batches)
+    return real / padded if padded else 1.0
+
+
+# --------------------------
+# Process-wide metrics
+# --------------------------
+
+
+class PaddingStats:
+    """Running totals of real vs padded tokens across forward passes.
+
+    Passes made inside ``paused()`` (e.g. warm-up dummies) are not recorded;
+    the pause is per thread, so concurrent real requests still count.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.calls = 0
+        self.batches = 0
+        self.items = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.last_efficiency = 1.0
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        previous = getattr(self._local, "paused", False)
+        self._local.paused = True
+        try:
+            yield
+        finally:
+            self._local.paused = previous
+
+    def record(self, lengths: Sequence[int], batches: List[List[int]]) -> None:
+        if getattr(self._local, "paused", False):
+            return
+        real, padded = _token_counts(lengths, batches)
+        with self._lock:
+            self.calls += 1
+            self.batches += len(batches)
+            self.items += sum(len(b) for b in batches)
+            self.real_tokens += real
+            self.padded_tokens += padded
+            self.last_efficiency = real / padded if padded else 1.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "real_tokens": self.real_tokens,
+                "padded_tokens": self.padded_tokens,
+                "padding_efficiency": (
+                    self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0
+                ),
+                "last_padding_efficiency": self.last_efficiency,
+            }
+
+
+PADDING_STATS = PaddingStats()
+
+
+def get_stats() -> Dict[str, Any]:
+    return PADDING_STATS.stats()
+
+
+__all__ = [
+    "plan_batches",
+    "padding_efficiency",
+    "PaddingStats",
+    "PADDING_STATS",
+    "get_stats",
+]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..config import SETTINGS
+
+
+# --------------------------
+# Uncertainty band
+# --------------------------
+
+
+def load_band() -> Tuple[float, float]:
+    """(low, high) FastText prob_hoax band that escalates to IndoBERT.
+
+    Uses the band picked by scripts/tune_cascade_band.py when present,
+    otherwise the SETTINGS defaults.
+    """
+    if os.path.exists(SETTINGS.cascade_band_path):
+        try:
+            with open(SETTINGS.cascade_band_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return float(data["low"]), float(data["high"])
+        except (OSError, ValueError, KeyError):
+            pass
+    return SETTINGS.cascade_band_low, SETTINGS.cascade_band_high
+
+
+def save_band(low: float, high: float, report: Dict) -> str:
+    with open(SETTINGS.cascade_band_path, "w", encoding="utf-8") as f:
+        json.dump({"low": low, "high": high, "report": report}, f, indent=2)
+    return SETTINGS.cascade_band_path
+
+
+def uncertain_mask(p_fasttext: np.ndarray, low: float, high: float) -> np.ndarray:
+    """True where FastText is not confident enough to decide alone."""
+    return (p_fasttext > low) & (p_fasttext < high)
+
+
+# --------------------------
+# Offline band selection
+# --------------------------
+
+
+def evaluate_bands(
+    y_true: np.ndarray,
+    p_fasttext: np.ndarray,
+    p_indobert: np.ndarray,
+    ft_seconds_per_text: float,
+    bert_seconds_per_text: float,
+    margins: List[float],
+) -> List[Dict[str, float]]:
+    """Cascade accuracy / escalation rate / speed-up for symmetric bands.
+
+    A margin m means the band (m, 1 - m): FastText decides when its
+    prob_hoax <= m or >= 1 - m, IndoBERT decides everything in between.
+    """
+    ft_pred = (p_fasttext >= 0.5).astype(int)
+    bert_pred = (p_indobert >= 0.5).astype(int)
+    bert_acc = float(np.mean(bert_pred == y_true))
+    bert_cost = bert_seconds_per_text
+
+    rows: List[Dict[str, float]] = []
+    for m in margins:
+        low, high = float(m), float(1.0 - m)
+        esc = uncertain_mask(p_fasttext, low, high)
+        pred = np.where(esc, bert_pred, ft_pred)
+        acc = float(np.mean(pred == y_true))
+        esc_rate = float(np.mean(esc))
+        cost = ft_seconds_per_text + esc_rate * bert_seconds_per_text
+        rows.append(
+            {
+                "low": low,
+                "high": high,
+                "accuracy": acc,
+                "accuracy_loss": bert_acc - acc,
+                "escalation_rate": esc_rate,
+                "speedup": bert_cost / cost if cost > 0 else float("inf"),
+            }
+        )
+    return rows
+
+
+def choose_band(
+    rows: List[Dict[str, float]], max_accuracy_loss: float
+) -> Dict[str, float]:
+    """Fastest band whose accuracy loss vs IndoBERT-only stays within budget."""
+    ok = [r for r in rows if r["accuracy_loss"] <= max_accuracy_loss]
+    if not ok:
+        # Nothing fits the budget: escalate as much as the grid allows
+        return max(rows, key=lambda r: r["escalation_rate"])
+    return max(ok, key=lambda r: r["speedup"])
+
+
+__all__ = [
+    "load_band",
+    "save_band",
+    "uncertain_mask",
+    "evaluate_bands",
+    "choose_band",
+]
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import SETTINGS
+from ..services.model_registry import get_current_version
+
+
+logger = logging.getLogger(__name__)
+
+class ResidentIndoBERT:
+    """Keep one IndoBERT tokenizer/model pair resident per process.
+
+    The pair is keyed by the registry's current version and is only reloaded
+    when ``get_current_version()`` changes (e.g. after an auto-retrain).
+    With backend="onnx" the model is an ONNX Runtime session exported for
+    that version (see onnx_export.py); with backend="int8" it is the dynamic
+    INT8 build of that version (see quantize.py). Both always run on CPU.
+    If no artifact was built for the current version, the torch checkpoint
+    is loaded instead (with a warning) rather than failing every request.
+    """
+
+    def __init__(self, model_dir: str, backend: str = "torch") -> None:
+        if backend not in ("torch", "onnx", "int8"):
+            raise ValueError(f"Unknown IndoBERT backend: {backend}")
+        self.model_dir = model_dir
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        # Backend actually serving the loaded version ("torch" on fallback)
+        self._active_backend: Optional[str] = None
+        self._tokenizer: Any = None
+        self._model: Any = None
+        self._device: Any = None
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._last_load_seconds = 0.0
+        self._total_load_seconds = 0.0
+        self._loaded_at: Optional[float] = None
+
+    def _load(self, version: str) -> None:
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        import torch
+
+        start = time.perf_counter()
+        tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        model: Any = None
+        active = self.backend
+        if self.backend == "onnx":
+            from .onnx_export import OnnxSequenceClassifier, find_onnx_model
+
+            onnx_path = find_onnx_model(version)
+            if onnx_path is not None:
+                model = OnnxSequenceClassifier(onnx_path)
+                device = torch.device("cpu")
+            else:
+                logger.warning(
+                    f"No ONNX export for IndoBERT {version}; falling back to torch "
+                    "(run `python -m src.modeling.onnx_export`)"
+                )
+        elif self.backend == "int8":
+            from .quantize import find_quantized_model, load_quantized
+
+            state_path = find_quantized_model(version)
+            if state_path is not None:
+                model = load_quantized(self.model_dir, state_path)
+                device = torch.device("cpu")
+            else:
+                logger.warning(
+                    f"No INT8 build for IndoBERT {version}; falling back to FP32 "
+                    "(run `python -m src.modeling.quantize`)"
+                )
+        if model is None:
+            active = "torch"
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_dir)
+            model.eval()
+            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            model.to(device)
+        elapsed = time.perf_counter() - start
+
+        self._tokenizer = tokenizer
+        self._model = model
+        self._device = device
+        self._version = version
+        self._active_backend = active
+        self._loads += 1
+        self._last_load_seconds = elapsed
+        self._total_load_seconds += elapsed
+        self._loaded_at = time.time()
+
+    def get(self) -> Tuple[Any, Any, Any, str]:
+        """Return (tokenizer, model, device, version), loading on first use."""
+        version = get_current_version()
+        if self._model is not None and self._version == version:
+            with self._lock:
+                self._hits += 1
+            return self._tokenizer, self._model, self._device, version
+
+        with self._lock:
+            # Another thread may have loaded it while we were waiting
+            if self._model is not None and self._version == version:
+                self._hits += 1
+            else:
+                self._misses += 1
+                self._load(version)
+            return self._tokenizer, self._model, self._device, version
+
+    def clear(self) -> None:
+        """Drop the resident model; the next call to ``get`` reloads it."""
+        with self._lock:
+            self._tokenizer = None
+            self._model = None
+            self._device = None
+            self._version = None
+            self._active_backend = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._model is not None,
+            "backend": self.backend,
+            "active_backend": self._active_backend,
+            "version": self._version,
+            "device": str(self._device) if self._device is not None else None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "last_load_seconds": round(self._last_load_seconds, 4),
+            "total_load_seconds": round(self._total_load_seconds, 4),
+            "loaded_at": self._loaded_at,
+        }
+
+
+class ResidentFastText:
+    """Keep the FastText .bin loaded once per process.
+
+    Reloaded only when the file on disk changes (train_fasttext rewrites
+    the same path), detected through its modification time.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._model: Any = None
+        self._mtime: Optional[float] = None
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._last_load_seconds = 0.0
+
+    def get(self) -> Any:
+        mtime = os.path.getmtime(self.model_path)
+        with self._lock:
+            if self._model is not None and self._mtime == mtime:
+                self._hits += 1
+                return self._model
+            import fasttext
+
+            self._misses += 1
+            start = time.perf_counter()
+            self._model = fasttext.load_model(self.model_path)
+            self._last_load_seconds = time.perf_counter() - start
+            self._mtime = mtime
+            self._loads += 1
+            return self._model
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._model is not None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "last_load_seconds": round(self._last_load_seconds, 4),
+        }
+
+
+INDOBERT = ResidentIndoBERT(SETTINGS.indobert_model_dir, SETTINGS.indobert_backend)
+FASTTEXT = ResidentFastText(SETTINGS.fasttext_model_path)
+
+# Non-default backends are created on demand (parity checks, benchmarks)
+_BACKENDS: Dict[str, ResidentIndoBERT] = {INDOBERT.backend: INDOBERT}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def get_indobert(backend: Optional[str] = None) -> Tuple[Any, Any, Any, str]:
+    if backend is None or backend == INDOBERT.backend:
+        return INDOBERT.get()
+    with _BACKENDS_LOCK:
+        resident = _BACKENDS.get(backend)
+        if resident is None:
+            resident = ResidentIndoBERT(SETTINGS.indobert_model_dir, backend)
+            _BACKENDS[backend] = resident
+    return resident.get()
+
+
+def get_fasttext() -> Any:
+    return FASTTEXT.get()
+
+
+_LAST_WARMUP: Dict[str, Any] = {}
+
+
+def warm_up(
+    token_lengths: Tuple[int, ...] = (16, 64, 256),
+    batch_sizes: Tuple[int, ...] = (1, 8),
+    include_fasttext: bool = True,
+) -> Dict[str, Any]:
+    """Load the active model(s) and run dummy batches of typical lengths.
+
+    The first forward pass pays for lazy kernel/allocator initialization and
+    tokenizer caches; doing it here keeps that cost off the first request.
+    Returns timings in seconds.
+    """
+    from .batching import PADDING_STATS
+    from .predict import indobert_probabilities, predict_fasttext
+
+    report: Dict[str, Any] = {"backend": INDOBERT.backend}
+    start = time.perf_counter()
+    INDOBERT.get()
+    report["load_seconds"] = round(time.perf_counter() - start, 4)
+
+    passes = time.perf_counter()
+    # Synthetic uniform batches would skew the reported padding efficiency
+    with PADDING_STATS.paused():
+        for n_tokens in token_lengths:
+            # Roughly one wordpiece per short Indonesian word
+            text = " ".join(["berita"] * max(1, n_tokens - 2))
+            for size in batch_sizes:
+                indobert_probabilities([text] * size, batch_size=size)
+    report["indobert_passes"] = len(token_lengths) * len(batch_sizes)
+    report["indobert_warmup_seconds"] = round(time.perf_counter() - passes, 4)
+
+    if include_fasttext and os.path.exists(FASTTEXT.model_path):
+        ft_start = time.perf_counter()
+        predict_fasttext(["berita hangat hari ini"] * 8)
+        report["fasttext_seconds"] = round(time.perf_counter() - ft_start, 4)
+
+    report["total_seconds"] = round(time.perf_counter() - start, 4)
+    _LAST_WARMUP.clear()
+    _LAST_WARMUP.update(report)
+    return report
+
+
+def get_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"indobert": INDOBERT.stats(), "fasttext": FASTTEXT.stats()}
+    if _LAST_WARMUP:
+        stats["warmup"] = dict(_LAST_WARMUP)
+    for backend, resident in _BACKENDS.items():
+        if resident is not INDOBERT:
+            stats[f"indobert_{backend}"] = resident.stats()
+    return stats
+
+
+__all__ = [
+    "ResidentIndoBERT",
+    "ResidentFastText",
+    "INDOBERT",
+    "FASTTEXT",
+    "get_indobert",
+    "get_fasttext",
+    "warm_up",
+    "get_stats",
+]
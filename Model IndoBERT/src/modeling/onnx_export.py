@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from ..config import SETTINGS
+from ..services.model_registry import REGISTRY_DIR, get_current_version
+
+
+ONNX_SUBDIR = "onnx"
+ONNX_FILE = "model.onnx"
+ONNX_OPTIMIZED_FILE = "model.optimized.onnx"
+EXPORT_INFO_FILE = "export_info.json"
+
+
+# --------------------------
+# Export
+# --------------------------
+
+
+def export_onnx(
+    model_dir: str, version: Optional[str] = None, opset: int = 14
+) -> str:
+    """Export a saved IndoBERT checkpoint to <model_dir>/onnx.
+
+    Writes model.onnx (dynamic batch/sequence axes) and a graph-optimized
+    model.optimized.onnx produced by ONNX Runtime. Returns the optimized path.
+    """
+    import torch
+    import onnxruntime as ort
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    out_dir = os.path.join(model_dir, ONNX_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    raw_path = os.path.join(out_dir, ONNX_FILE)
+    opt_path = os.path.join(out_dir, ONNX_OPTIMIZED_FILE)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    # Exported graphs must not depend on torch's return_dict objects
+    model.config.return_dict = False
+
+    sample = tokenizer(
+        ["contoh teks untuk ekspor onnx", "teks kedua"],
+        padding=True,
+        return_tensors="pt",
+    )
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic_axes: Dict[str, Dict[int, str]] = {
+        name: {0: "batch", 1: "sequence"} for name in input_names
+    }
+    dynamic_axes["logits"] = {0: "batch"}
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            raw_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    # Let ONNX Runtime fuse attention/GELU/LayerNorm and save the result
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    opts.optimized_model_filepath = opt_path
+    ort.InferenceSession(raw_path, opts, providers=["CPUExecutionProvider"])
+
+    with open(os.path.join(out_dir, EXPORT_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": version,
+                "source_dir": model_dir,
+                "opset": opset,
+                "timestamp": int(time.time()),
+                "export_seconds": round(time.perf_counter() - start, 2),
+            },
+            f,
+            indent=2,
+        )
+    return opt_path
+
+
+def version_dirs() -> Dict[str, str]:
+    """Archived checkpoints in indobert_versions as {version: path}."""
+    out: Dict[str, str] = {}
+    if not os.path.isdir(REGISTRY_DIR):
+        return out
+    for name in sorted(os.listdir(REGISTRY_DIR)):
+        path = os.path.join(REGISTRY_DIR, name)
+        if name.startswith("indobert_") and os.path.isdir(path):
+            out[name[len("indobert_") :]] = path
+    return out
+
+
+def export_all() -> List[str]:
+    """Export models/indobert (as the current version) and every archived version."""
+    paths = []
+    if os.path.isdir(SETTINGS.indobert_model_dir):
+        paths.append(export_onnx(SETTINGS.indobert_model_dir, get_current_version()))
+    for version, path in version_dirs().items():
+        paths.append(export_onnx(path, version))
+    return paths
+
+
+# --------------------------
+# Inference
+# --------------------------
+
+
+def _export_version(out_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(out_dir, EXPORT_INFO_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+def find_onnx_model(version: str) -> Optional[str]:
+    """ONNX file exported for the given registry version, if any.
+
+    A candidate only counts if its export_info.json records that version:
+    an export copied along with a checkpoint belongs to the older model.
+    """
+    candidates = [
+        os.path.join(REGISTRY_DIR, f"indobert_{version}", ONNX_SUBDIR),
+        os.path.join(SETTINGS.indobert_model_dir, ONNX_SUBDIR),
+    ]
+    for out_dir in candidates:
+        if _export_version(out_dir) != version:
+            continue
+        for fname in (ONNX_OPTIMIZED_FILE, ONNX_FILE):
+            path = os.path.join(out_dir, fname)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session behind the same call interface as the torch model.
+
+    ``model(**batch).logits`` returns a torch tensor, so predict.py's batched
+    path works unchanged with either backend.
+    """
+
+    def __init__(self, onnx_path: str, intra_op_threads: int = 0) -> None:
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            opts.intra_op_num_threads = intra_op_threads
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(
+            onnx_path, opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs: Any) -> SimpleNamespace:
+        import torch
+
+        feed = {
+            name: inputs[name].cpu().numpy().astype("int64")
+            for name in self.input_names
+            if name in inputs
+        }
+        (logits,) = self.session.run(["logits"], feed)
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export IndoBERT checkpoints to ONNX")
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="Export only this checkpoint (default: models/indobert and all versions)",
+    )
+    parser.add_argument("--version", default=None, help="Registry version of --model-dir")
+    args = parser.parse_args()
+
+    if args.model_dir:
+        print(export_onnx(args.model_dir, args.version))
+    else:
+        for path in export_all():
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,32 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple, Optional
 
 from ..config import SETTINGS
 from ..features import normalize_batch
 from .. import feedback
-from ..services.model_registry import get_current_version
+from .batching import PADDING_STATS, plan_batches
+from .model_manager import get_fasttext, get_indobert
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def fasttext_probabilities(model, texts: List[str]) -> "np.ndarray":
+    """prob_hoax for already-normalized texts using fastText's list input.
+
+    One native predict call scores the whole batch; the (label, score)
+    pairs are mapped to P(label=1) with NumPy instead of a per-row dict.
+    """
+    import numpy as np
+
+    if not texts:
+        return np.zeros(0, dtype=np.float32)
+    labels, scores = model.predict(texts, k=2)
+    labels_arr = np.asarray(labels)  # (n, k) label strings
+    scores_arr = np.asarray(scores, dtype=np.float32)  # (n, k)
+    is_hoax = labels_arr == "__label__1"
+    return np.where(is_hoax, scores_arr, 0.0).sum(axis=1).astype(np.float32)
 
 
 def predict_fasttext(
@@ -19,25 +40,16 @@ def predict_fasttext(
     If return_proba=True returns (preds, prob_hoax_list).
     If log_feedback=True also appends rows to feedback.csv.
     """
-    import fasttext
+    import numpy as np
 
     texts_list = list(texts)
-    model = fasttext.load_model(SETTINGS.fasttext_model_path)
-    norm = normalize_batch(texts_list)
-    preds: List[int] = []
-    probs_hoax: List[float] = []
-    confidences: List[float] = []
-    for t in norm:
-        labels, scores = model.predict(t, k=2)
-        # Map labels to probabilities (scores already softmax-like in fastText)
-        lbl_map = {lab.replace("__label__", ""): sc for lab, sc in zip(labels, scores)}
-        p1 = float(lbl_map.get("1", 0.0))
-        # Determine predicted label as argmax
-        pred = 1 if p1 >= 0.5 else 0
-        conf = float(max(scores)) if scores else (p1 if p1 > 0 else 1 - p1)
-        preds.append(pred)
-        probs_hoax.append(p1)
-        confidences.append(conf)
+    # The .bin stays resident per process; reloaded only when the file changes
+    model = get_fasttext()
+    p1 = fasttext_probabilities(model, normalize_batch(texts_list))
+    pred_arr = (p1 >= 0.5).astype(int)
+    preds: List[int] = pred_arr.tolist()
+    probs_hoax: List[float] = p1.tolist()
+    confidences: List[float] = np.where(pred_arr == 1, p1, 1 - p1).tolist()
 
     if log_feedback:
         feedback.log_prediction(
@@ -54,42 +66,205 @@ def predict_fasttext(
     return preds
 
 
+def _forward_batched(
+    features: List[Dict[str, List[int]]],
+    tokenizer,
+    model,
+    device,
+    batch_size: int,
+    max_batch_tokens: int,
+) -> "np.ndarray":
+    """Softmax probabilities (len(features), 2) for already-tokenized inputs.
+
+    Inputs are bucketed by token length (batching.plan_batches) so short
+    forwards are not padded up to long articles; rows are written back by
+    index, so the output keeps the input order.
+    """
+    import torch
+    import numpy as np
+
+    probs = np.zeros((len(features), 2), dtype=np.float32)
+    lengths = [len(f["input_ids"]) for f in features]
+    batches = plan_batches(lengths, batch_size, max_batch_tokens)
+    PADDING_STATS.record(lengths, batches)
+    with torch.no_grad():
+        for idx in batches:
+            # Each batch is padded only to its own longest sequence
+            batch = tokenizer.pad([features[i] for i in idx], return_tensors="pt")
+            logits = model(**batch.to(device)).logits
+            probs[idx] = torch.softmax(logits, dim=-1).cpu().numpy()
+    return probs
+
+
+def indobert_probabilities(
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Tuple["np.ndarray", str]:
+    """Run the resident IndoBERT over texts in padded batches.
+
+    backend ("torch" or "onnx") defaults to SETTINGS.indobert_backend.
+    Returns (probs, model_version) where probs has shape (len(texts), 2).
+    """
+    import numpy as np
+
+    batch_size = max(1, batch_size or SETTINGS.indobert_batch_size)
+    max_batch_tokens = max_batch_tokens or SETTINGS.indobert_max_batch_tokens
+
+    # Tokenizer/model stay resident per process; reloaded only on version change
+    tokenizer, model, device, model_version = get_indobert(backend)
+    if not texts:
+        return np.zeros((0, 2), dtype=np.float32), model_version
+
+    # Tokenize once without padding
+    enc = tokenizer(texts, truncation=True, max_length=SETTINGS.indobert_max_length)
+    features = [{k: enc[k][i] for k in enc.keys()} for i in range(len(texts))]
+    probs = _forward_batched(
+        features, tokenizer, model, device, batch_size, max_batch_tokens
+    )
+    return probs, model_version
+
+
+def _window_starts(n_tokens: int, window: int, overlap: int, max_windows: int):
+    """Start offsets of overlapping windows covering n_tokens (at most max_windows)."""
+    import numpy as np
+
+    step = max(1, window - overlap)
+    starts = list(range(0, max(n_tokens - window, 0) + 1, step))
+    if starts[-1] + window < n_tokens:
+        starts.append(n_tokens - window)
+    if len(starts) > max_windows:
+        # Keep evenly spaced windows so the whole document is still sampled
+        picks = np.linspace(0, len(starts) - 1, max_windows).round().astype(int)
+        starts = [starts[i] for i in sorted(set(picks.tolist()))]
+    return starts
+
+
+def _aggregate_windows(window_probs: "np.ndarray", rule: str) -> "np.ndarray":
+    """Combine per-window probabilities (w, 2) into one (2,) row."""
+    import numpy as np
+
+    if rule == "max":
+        # Most hoax-like window decides
+        return window_probs[int(window_probs[:, 1].argmax())]
+    if rule == "mean":
+        return window_probs.mean(axis=0)
+    if rule == "attention":
+        # Weight windows by how decisive they are (|log-odds|), so neutral
+        # boilerplate windows contribute little to the final verdict
+        eps = 1e-6
+        margin = np.abs(
+            np.log(window_probs[:, 1] + eps) - np.log(window_probs[:, 0] + eps)
+        )
+        weights = np.exp(margin - margin.max())
+        weights /= weights.sum()
+        return (window_probs * weights[:, None]).sum(axis=0)
+    raise ValueError(f"Unknown window aggregate rule: {rule}")
+
+
+def indobert_window_probabilities(
+    texts: List[str],
+    overlap: Optional[int] = None,
+    max_windows: Optional[int] = None,
+    aggregate: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Tuple["np.ndarray", str, List[int]]:
+    """Score long texts with overlapping max_length token windows.
+
+    All windows of all texts are scored together in batched passes, then
+    combined per text with aggregate ("max", "mean" or "attention").
+    Returns (probs, model_version, windows_per_text).
+    """
+    import numpy as np
+
+    overlap = SETTINGS.indobert_window_overlap if overlap is None else overlap
+    max_windows = max(1, max_windows or SETTINGS.indobert_max_windows)
+    aggregate = aggregate or SETTINGS.indobert_window_aggregate
+    batch_size = max(1, batch_size or SETTINGS.indobert_batch_size)
+    max_batch_tokens = max_batch_tokens or SETTINGS.indobert_max_batch_tokens
+
+    tokenizer, model, device, model_version = get_indobert(backend)
+    if not texts:
+        return np.zeros((0, 2), dtype=np.float32), model_version, []
+    window = SETTINGS.indobert_max_length - tokenizer.num_special_tokens_to_add(
+        pair=False
+    )
+
+    features: List[Dict[str, List[int]]] = []
+    owners: List[int] = []
+    ids_per_text = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    for i, ids in enumerate(ids_per_text):
+        for start in _window_starts(len(ids), window, overlap, max_windows):
+            features.append(
+                dict(tokenizer.prepare_for_model(ids[start : start + window]))
+            )
+            owners.append(i)
+
+    window_probs = _forward_batched(
+        features, tokenizer, model, device, batch_size, max_batch_tokens
+    )
+    owners_arr = np.asarray(owners)
+    probs = np.zeros((len(texts), 2), dtype=np.float32)
+    counts: List[int] = []
+    for i in range(len(texts)):
+        rows = window_probs[owners_arr == i]
+        probs[i] = _aggregate_windows(rows, aggregate)
+        counts.append(len(rows))
+    return probs, model_version, counts
+
+
 def predict_indobert(
     texts: Iterable[str],
     return_proba: bool = False,
     log_feedback: bool = False,
     user_labels: Optional[Iterable[Optional[int]]] = None,
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+    long_document: bool = False,
+    max_windows: Optional[int] = None,
+    window_aggregate: Optional[str] = None,
+    backend: Optional[str] = None,
 ) -> List[int] | Tuple[List[int], List[float]]:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
-    import numpy as np
+    """Predict with IndoBERT.
 
-    texts_list = list(texts)
-    tokenizer = AutoTokenizer.from_pretrained(SETTINGS.indobert_model_dir)
-    model = AutoModelForSequenceClassification.from_pretrained(
-        SETTINGS.indobert_model_dir
-    )
-    model.eval()
+    Texts are scored in padded batches of up to batch_size (default
+    SETTINGS.indobert_batch_size), cut early when a batch would exceed
+    max_batch_tokens padded tokens. batch_size=1 scores one text per pass.
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
+    With long_document=True texts longer than max_length are split into
+    overlapping token windows (at most max_windows per text) whose scores
+    are combined with window_aggregate ("max", "mean" or "attention")
+    instead of being truncated.
 
-    preds: List[int] = []
-    probs_hoax: List[float] = []
-    confidences: List[float] = []
-    for t in texts_list:
-        enc = tokenizer(t, truncation=True, max_length=256, return_tensors="pt").to(
-            device
+    backend selects "torch" or "onnx" (ONNX Runtime); None uses
+    SETTINGS.indobert_backend.
+    """
+    import numpy as np
+
+    texts_list = list(texts)
+    if long_document:
+        probs, model_version, _ = indobert_window_probabilities(
+            texts_list,
+            max_windows=max_windows,
+            aggregate=window_aggregate,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
+        )
+    else:
+        probs, model_version = indobert_probabilities(
+            texts_list,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
         )
-        with torch.no_grad():
-            logits = model(**enc).logits
-            probs = torch.softmax(logits, dim=-1).cpu().numpy()[0]
-            p1 = float(probs[1])  # probability for label=1
-            pred = int(np.argmax(probs))
-            conf = float(probs[pred])
-        preds.append(pred)
-        probs_hoax.append(p1)
-        confidences.append(conf)
+    pred_arr = probs.argmax(axis=1)
+    preds: List[int] = pred_arr.tolist()
+    probs_hoax: List[float] = probs[:, 1].tolist()  # probability for label=1
+    confidences: List[float] = probs[np.arange(len(pred_arr)), pred_arr].tolist()
 
     if log_feedback:
         feedback.log_prediction(
@@ -98,10 +273,75 @@ def predict_indobert(
             probs_hoax,
             confidences,
             model_name="indobert",
-            model_version=get_current_version(),
+            model_version=model_version,
             user_labels=user_labels,
         )
 
     if return_proba:
         return preds, probs_hoax
     return preds
+
+
+def predict_cascade(
+    texts: Iterable[str],
+    return_proba: bool = False,
+    log_feedback: bool = False,
+    user_labels: Optional[Iterable[Optional[int]]] = None,
+    return_stages: bool = False,
+):
+    """FastText first, IndoBERT only for texts FastText is unsure about.
+
+    Texts whose FastText prob_hoax falls inside the uncertainty band
+    (cascade.load_band()) are re-scored with IndoBERT in one batch.
+    Feedback rows record the deciding stage as model_name
+    "cascade:fasttext" or "cascade:indobert".
+    If return_stages=True the list of deciding stages is appended to the
+    returned tuple.
+    """
+    import numpy as np
+    from .cascade import load_band, uncertain_mask
+
+    texts_list = list(texts)
+    _, ft_probs = predict_fasttext(texts_list, return_proba=True)  # type: ignore
+    probs = np.asarray(ft_probs, dtype=np.float32)
+    low, high = load_band()
+    escalate = np.flatnonzero(uncertain_mask(probs, low, high))
+
+    model_version = None
+    if len(escalate):
+        bert_probs, model_version = indobert_probabilities(
+            [texts_list[i] for i in escalate]
+        )
+        probs[escalate] = bert_probs[:, 1]
+
+    preds: List[int] = (probs >= 0.5).astype(int).tolist()
+    probs_hoax: List[float] = probs.tolist()
+    stages = ["fasttext"] * len(texts_list)
+    for i in escalate:
+        stages[i] = "indobert"
+
+    if log_feedback:
+        from ..services.model_registry import get_current_version
+
+        model_version = model_version or get_current_version()
+        labels = (
+            list(user_labels) if user_labels is not None else [None] * len(texts_list)
+        )
+        for stage in ("fasttext", "indobert"):
+            idx = [i for i, s in enumerate(stages) if s == stage]
+            if not idx:
+                continue
+            feedback.log_prediction(
+                [texts_list[i] for i in idx],
+                [preds[i] for i in idx],
+                [probs_hoax[i] for i in idx],
+                [max(probs_hoax[i], 1 - probs_hoax[i]) for i in idx],
+                model_name=f"cascade:{stage}",
+                model_version=model_version,
+                user_labels=[labels[i] for i in idx],
+            )
+
+    out = (preds, probs_hoax) if return_proba else (preds,)
+    if return_stages:
+        return (*out, stages)
+    return out if return_proba else preds
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..config import PROCESSED_DIR, SETTINGS
+from ..services.model_registry import REGISTRY_DIR, get_current_version
+
+
+QUANTIZED_SUBDIR = "int8"
+QUANTIZED_FILE = "model_int8.pt"
+REPORT_FILE = "quantization_report.json"
+
+
+# --------------------------
+# Build / load
+# --------------------------
+
+
+def quantize_dynamic_int8(model):
+    """Dynamic INT8 quantization of every nn.Linear (weights int8, activations
+    quantized on the fly). Embeddings and LayerNorm stay FP32."""
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def load_quantized(model_dir: str, state_path: str):
+    """Rebuild the quantized module from config and load its saved state_dict."""
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+
+    config = AutoConfig.from_pretrained(model_dir)
+    model = quantize_dynamic_int8(
+        AutoModelForSequenceClassification.from_config(config).eval()
+    )
+    model.load_state_dict(torch.load(state_path, map_location="cpu"))
+    model.eval()
+    return model
+
+
+def find_quantized_model(version: str) -> Optional[str]:
+    """INT8 state_dict built for the given registry version, if any.
+
+    A candidate only counts if its quantization report records that version:
+    a build copied along with a checkpoint belongs to the older model.
+    """
+    candidates = [
+        os.path.join(REGISTRY_DIR, f"indobert_{version}", QUANTIZED_SUBDIR),
+        # Unarchived current model (e.g. the initial v1) quantized in place
+        os.path.join(SETTINGS.indobert_model_dir, QUANTIZED_SUBDIR),
+    ]
+    for out_dir in candidates:
+        path = os.path.join(out_dir, QUANTIZED_FILE)
+        try:
+            with open(os.path.join(out_dir, REPORT_FILE), "r", encoding="utf-8") as f:
+                if json.load(f).get("version") == version and os.path.exists(path):
+                    return path
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def build_quantized(
+    model_dir: str,
+    version: Optional[str] = None,
+    report: bool = True,
+    limit: Optional[int] = None,
+    latency_samples: int = 200,
+) -> Dict[str, Any]:
+    """Write <model_dir>/int8/model_int8.pt and (optionally) a comparison
+    report against the FP32 checkpoint on data/processed/test.csv."""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    out_dir = os.path.join(model_dir, QUANTIZED_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, QUANTIZED_FILE)
+
+    fp32 = AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+    int8 = quantize_dynamic_int8(
+        AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+    )
+    torch.save(int8.state_dict(), state_path)
+
+    result: Dict[str, Any] = {
+        "model_dir": model_dir,
+        "version": version,
+        "path": state_path,
+    }
+    if report:
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        result.update(
+            compare_models(tokenizer, fp32, int8, limit=limit, latency_samples=latency_samples)
+        )
+        result["size_mb"] = {
+            "fp32": round(_state_size_mb(fp32), 2),
+            "int8": round(os.path.getsize(state_path) / 2**20, 2),
+        }
+    with open(os.path.join(out_dir, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def _state_size_mb(model) -> float:
+    import io
+    import torch
+
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 2**20
+
+
+# --------------------------
+# FP32 vs INT8 comparison
+# --------------------------
+
+
+def compare_models(
+    tokenizer,
+    fp32,
+    int8,
+    limit: Optional[int] = None,
+    latency_samples: int = 200,
+) -> Dict[str, Any]:
+    """Accuracy/F1 on test.csv and batch-1 p50/p95 latency for both models."""
+    import torch
+    from .predict import _forward_batched
+    from .train import compute_metrics
+
+    test_df = pd.read_csv(os.path.join(PROCESSED_DIR, "test.csv"))
+    if limit:
+        test_df = test_df.head(limit)
+    texts = test_df["text"].astype(str).tolist()
+    y_true = test_df["label"].astype(int).values
+
+    enc = tokenizer(texts, truncation=True, max_length=SETTINGS.indobert_max_length)
+    features = [{k: enc[k][i] for k in enc.keys()} for i in range(len(texts))]
+    device = torch.device("cpu")
+
+    out: Dict[str, Any] = {"test_size": len(texts)}
+    for name, model in (("fp32", fp32), ("int8", int8)):
+        probs = _forward_batched(
+            features,
+            tokenizer,
+            model,
+            device,
+            SETTINGS.indobert_batch_size,
+            SETTINGS.indobert_max_batch_tokens,
+        )
+        metrics = compute_metrics(y_true, probs.argmax(axis=1))
+        latencies: List[float] = []
+        for feat in features[:latency_samples]:
+            start = time.perf_counter()
+            _forward_batched([feat], tokenizer, model, device, 1, 10**9)
+            latencies.append((time.perf_counter() - start) * 1000)
+        out[name] = {
+            "accuracy": float(metrics["accuracy"]),
+            "f1": float(metrics["f1"]),
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if latencies else None,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if latencies else None,
+        }
+    out["accuracy_delta"] = out["int8"]["accuracy"] - out["fp32"]["accuracy"]
+    out["f1_delta"] = out["int8"]["f1"] - out["fp32"]["f1"]
+    return out
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    if "fp32" not in result:
+        return f"INT8 tersimpan di: {result['path']}"
+    lines = [
+        f"INT8 tersimpan di: {result['path']} (test: {result['test_size']} teks)",
+        f"{'model':>6} {'size MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'acc':>7} {'f1':>7}",
+    ]
+    for name in ("fp32", "int8"):
+        r = result[name]
+        lines.append(
+            f"{name:>6} {result['size_mb'][name]:8.1f} {r['latency_p50_ms']:8.2f} "
+            f"{r['latency_p95_ms']:8.2f} {r['accuracy']:7.4f} {r['f1']:7.4f}"
+        )
+    lines.append(
+        f"Delta INT8 - FP32: akurasi {result['accuracy_delta']:+.4f}, F1 {result['f1_delta']:+.4f}"
+    )
+    return "\n".join(lines)
+
+
+__all__ = [
+    "quantize_dynamic_int8",
+    "load_quantized",
+    "find_quantized_model",
+    "build_quantized",
+    "compare_models",
+    "format_report",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build dynamic INT8 IndoBERT for CPU inference"
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="Checkpoint to quantize (default: archive of the current version)",
+    )
+    parser.add_argument("--version", default=None, help="Registry version of --model-dir")
+    parser.add_argument("--limit", type=int, default=None, help="Limit test.csv rows")
+    parser.add_argument(
+        "--no-report", action="store_true", help="Skip the FP32 vs INT8 comparison"
+    )
+    args = parser.parse_args()
+
+    version = args.version
+    model_dir = args.model_dir
+    if model_dir is None:
+        version = get_current_version()
+        model_dir = os.path.join(REGISTRY_DIR, f"indobert_{version}")
+        if not os.path.isdir(model_dir):
+            model_dir = SETTINGS.indobert_model_dir
+    result = build_quantized(
+        model_dir, version, report=not args.no_report, limit=args.limit
+    )
+    print(format_report(result))
+
+
+if __name__ == "__main__":
+    main()
+
@@ -32,6 +32,14 @@ def compute_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
 # --------------------------
 
 
+def _fasttext_labels(model, df: pd.DataFrame) -> np.ndarray:
+    """Batch-predict labels for df["text"] with one native fastText call."""
+    from .predict import fasttext_probabilities
+
+    p1 = fasttext_probabilities(model, normalize_batch(df["text"].tolist()))
+    return (p1 >= 0.5).astype(int)
+
+
 def train_fasttext(
     train_df: pd.DataFrame, val_df: pd.DataFrame, test_df: pd.DataFrame
 ) -> Dict:
@@ -62,14 +70,7 @@ def train_fasttext(
         )
 
         # Evaluate on validation
-        def predict_labels(df: pd.DataFrame):
-            texts = normalize_batch(df["text"].tolist())
-            preds = [
-                int(model.predict(t)[0][0].replace("__label__", "")) for t in texts
-            ]
-            return np.array(preds)
-
-        val_pred = predict_labels(val_df)
+        val_pred = _fasttext_labels(model, val_df)
         val_metrics = compute_metrics(val_df["label"].values, val_pred)
 
         # Save model
@@ -79,12 +80,8 @@ def train_fasttext(
     import fasttext
 
     model = fasttext.load_model(SETTINGS.fasttext_model_path)
-    test_texts = normalize_batch(test_df["text"].tolist())
-    test_pred = [
-        int(model.predict(t)[0][0].replace("__label__", "")) for t in test_texts
-    ]
     y_true = test_df["label"].values
-    y_pred = np.array(test_pred)
+    y_pred = _fasttext_labels(model, test_df)
     test_metrics = compute_metrics(y_true, y_pred)
     # Artifacts
     plot_confusion_matrix(
@@ -304,12 +301,10 @@ def run_indobert_and_compare_barplot(epochs: int = 1) -> str:
         ft_res = train_fasttext(train_df, val_df, test_df)
         ft_test = ft_res["test"]
     else:
-        import fasttext
+        from .model_manager import get_fasttext
 
-        model = fasttext.load_model(SETTINGS.fasttext_model_path)
-        texts = normalize_batch(test_df["text"].tolist())
-        preds = [int(model.predict(t)[0][0].replace("__label__", "")) for t in texts]
-        ft_test = compute_metrics(test_df["label"].values, np.array(preds))
+        preds = _fasttext_labels(get_fasttext(), test_df)
+        ft_test = compute_metrics(test_df["label"].values, preds)
 
     # IndoBERT short run
     bp = BertParams(epochs=epochs)
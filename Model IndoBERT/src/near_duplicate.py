@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import PROCESSED_DIR, SETTINGS
+from .feedback import FEEDBACK_FILE, FIELDNAMES
+from .features import normalize_text
+
+
+# Prime just above 2**32 so (a * x + b) % P permutes 32-bit shingle hashes
+_PRIME = np.uint64(4294967311)
+
+
+# feedback.csv model_name values for verdicts copied from another row; they
+# are never indexed again (the index would otherwise feed on its own output)
+COPIED_VERDICT_MODEL_NAMES = ("near_duplicate", "cache")
+_LOCAL_VERSION = re.compile(r"v\d+")
+
+
+@dataclass
+class NearDuplicateMatch:
+    similarity: float  # exact Jaccard similarity of shingle sets
+    label: int
+    prob_hoax: float
+    source: str  # feedback | feedback_user_label | train | val | test
+    model_name: str = ""  # model that produced the verdict (feedback rows)
+    model_version: str = ""  # its version; "ground_truth" for dataset splits
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index over previously scored texts.
+
+    Texts are normalized with features.normalize_text and split into
+    character shingles, so forwarded copies that only differ by emoji,
+    URLs or a "SEBARKAN!!" suffix land on (nearly) the same signature.
+    LSH only proposes candidates; each one is verified with the exact
+    Jaccard similarity of its shingle set. Texts shorter than one shingle
+    after normalization are neither indexed nor matched; only the first
+    max_chars normalized characters are shingled, and at most max_entries
+    verdicts are kept, which bounds both query cost and memory.
+
+    model_version is the registry version the index was built for: feedback
+    verdicts from other local versions (v<N>) are skipped unless a user
+    confirmed the label.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SETTINGS.near_dup_threshold,
+        num_perm: int = SETTINGS.near_dup_num_perm,
+        bands: int = SETTINGS.near_dup_bands,
+        shingle_size: int = SETTINGS.near_dup_shingle_size,
+        model_version: Optional[str] = None,
+        max_chars: int = SETTINGS.near_dup_max_chars,
+        max_entries: int = SETTINGS.near_dup_max_entries,
+    ) -> None:
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.model_version = model_version
+        self.max_chars = max_chars
+        self.max_entries = max_entries
+        rng = np.random.default_rng(SETTINGS.random_seed)
+        self._a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        # Sorted unique shingle hashes (uint32) per entry, for exact Jaccard
+        self._shingle_sets: List[np.ndarray] = []
+        self._entries: List[NearDuplicateMatch] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+
+        # Incremental feedback.csv tracking
+        self._feedback_offset = 0
+        self._feedback_last_id = 0
+        self._processed_splits: tuple = ()
+        self._stats = {
+            "queries": 0,
+            "matches": 0,
+            "candidates_rejected": 0,
+            "feedback_rebuilds": 0,
+            "skipped_copied": 0,
+            "skipped_stale_version": 0,
+            "skipped_full": 0,
+        }
+
+    # ---------------- MinHash ----------------
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Sorted unique shingle hashes (empty if shorter than one shingle)."""
+        t = normalize_text(text)[: self.max_chars]
+        k = self.shingle_size
+        if len(t) < k:
+            return np.empty(0, dtype=np.uint32)
+        grams = {t[i : i + k] for i in range(len(t) - k + 1)}
+        return np.unique(
+            np.fromiter(
+                (zlib.crc32(g.encode("utf-8")) for g in grams),
+                dtype=np.uint32,
+                count=len(grams),
+            )
+        )
+
+    def _minhash(self, shingles: np.ndarray) -> np.ndarray:
+        x = shingles.astype(np.uint64)
+        hashed = (self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        x = self._shingles(text)
+        return self._minhash(x) if x.size else None
+
+    @staticmethod
+    def _jaccard(a: np.ndarray, b: np.ndarray) -> float:
+        inter = np.intersect1d(a, b, assume_unique=True).size
+        return inter / float(a.size + b.size - inter)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        r = self.rows
+        return [sig[i * r : (i + 1) * r].tobytes() for i in range(self.bands)]
+
+    # ---------------- Index ----------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(
+        self,
+        text: str,
+        label: int,
+        prob_hoax: float,
+        source: str,
+        model_name: str = "",
+        model_version: str = "",
+    ) -> int:
+        """Index one verdict; returns its position, or -1 if it was skipped."""
+        if len(self._entries) >= self.max_entries:
+            self._stats["skipped_full"] += 1
+            return -1
+        shingles = self._shingles(text)
+        if not shingles.size:
+            return -1
+        sig = self._minhash(shingles)
+        with self._lock:
+            idx = len(self._entries)
+            self._shingle_sets.append(shingles)
+            self._entries.append(
+                NearDuplicateMatch(
+                    1.0,
+                    int(label),
+                    float(prob_hoax),
+                    source,
+                    model_name,
+                    model_version,
+                )
+            )
+            for band, key in zip(self._buckets, self._band_keys(sig)):
+                band.setdefault(key, []).append(idx)
+        return idx
+
+    def query(self, text: str) -> Optional[NearDuplicateMatch]:
+        """Return the most similar indexed verdict above the threshold."""
+        shingles = self._shingles(text)
+        with self._lock:
+            self._stats["queries"] += 1
+        if not shingles.size:
+            return None
+        sig = self._minhash(shingles)
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(band.get(key, ()))
+        # Entries are append-only, so candidates can be verified without
+        # holding the lock against a concurrent refresh
+        best: Optional[NearDuplicateMatch] = None
+        rejected = 0
+        for idx in candidates:
+            sim = self._jaccard(self._shingle_sets[idx], shingles)
+            if sim < self.threshold:
+                rejected += 1
+                continue
+            if best is None or sim > best.similarity:
+                e = self._entries[idx]
+                best = NearDuplicateMatch(
+                    sim,
+                    e.label,
+                    e.prob_hoax,
+                    e.source,
+                    e.model_name,
+                    e.model_version,
+                )
+        with self._lock:
+            self._stats["candidates_rejected"] += rejected
+            if best is not None:
+                self._stats["matches"] += 1
+        return best
+
+    # ---------------- Sources ----------------
+
+    def load_processed(self, splits=("train", "val", "test")) -> int:
+        """Index the labelled processed splits (text,label)."""
+        self._processed_splits = tuple(splits)
+        added = 0
+        for split in splits:
+            path = os.path.join(PROCESSED_DIR, f"{split}.csv")
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    label = int(r["label"])
+                    self.add(
+                        r["text"], label, float(label), split, "dataset", "ground_truth"
+                    )
+                    added += 1
+        return added
+
+    def refresh_feedback(self) -> Optional[int]:
+        """Index feedback rows appended since the last refresh.
+
+        Reads from the last byte offset. Returns None without touching the
+        index if feedback.csv was rewritten (e.g. by update_user_label); the
+        caller then builds a fresh index and swaps it in.
+        """
+        if not os.path.exists(FEEDBACK_FILE):
+            return 0
+        size = os.path.getsize(FEEDBACK_FILE)
+        if size == self._feedback_offset:
+            return 0
+
+        with open(FEEDBACK_FILE, "rb") as f:
+            if self._feedback_offset:
+                if size < self._feedback_offset:
+                    return None
+                f.seek(self._feedback_offset)
+                rows, consumed = self._parse_complete_lines(f.read())
+                # New rows must continue the id sequence, otherwise the file
+                # was rewritten and our offset points into the middle of it
+                try:
+                    if rows and int(rows[0]["id"]) <= self._feedback_last_id:
+                        return None
+                except (TypeError, ValueError):
+                    return None
+                self._feedback_offset += consumed
+            else:
+                data = f.read()
+                header_end = data.find(b"\n") + 1
+                rows, consumed = self._parse_complete_lines(data[header_end:])
+                self._feedback_offset = header_end + consumed
+
+        added = 0
+        for r in rows:
+            try:
+                rid = int(r["id"])
+                pred = int(r["prediction"])
+                p1 = float(r["prob_hoax"])
+            except (TypeError, ValueError, KeyError):
+                continue
+            self._feedback_last_id = max(self._feedback_last_id, rid)
+            text = (r.get("raw_text") or "").replace("\\n", "\n")
+            if not text:
+                continue
+            model_name = r.get("model_name") or ""
+            model_version = r.get("model_version") or ""
+            user_label = r.get("user_label", "")
+            # A user-confirmed label outranks the model's own prediction
+            if user_label not in ("", None):
+                label = int(user_label)
+                p1 = float(label)
+                source = "feedback_user_label"
+            elif model_name in COPIED_VERDICT_MODEL_NAMES:
+                self._stats["skipped_copied"] += 1
+                continue
+            elif (
+                self.model_version
+                and _LOCAL_VERSION.fullmatch(model_version)
+                and model_version != self.model_version
+            ):
+                # Verdict of a superseded local model
+                self._stats["skipped_stale_version"] += 1
+                continue
+            else:
+                label = pred
+                source = "feedback"
+            if self.add(text, label, p1, source, model_name, model_version) >= 0:
+                added += 1
+        return added
+
+    @staticmethod
+    def _parse_complete_lines(data: bytes):
+        """Parse CSV rows up to the last newline (a row may be mid-append)."""
+        end = data.rfind(b"\n") + 1
+        text = data[:end].decode("utf-8", errors="replace")
+        rows = list(csv.DictReader(io.StringIO(text), fieldnames=FIELDNAMES))
+        return rows, end
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "size": len(self._entries),
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "max_entries": self.max_entries,
+            "model_version": self.model_version,
+            "last_feedback_id": self._feedback_last_id,
+            **self._stats,
+        }
+
+
+_INDEX: Optional[NearDuplicateIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def _build_index(
+    include_processed: bool, model_version: Optional[str]
+) -> NearDuplicateIndex:
+    index = NearDuplicateIndex(model_version=model_version)
+    if include_processed:
+        index.load_processed()
+    if index.refresh_feedback() is None:  # rewritten while we were reading
+        index = NearDuplicateIndex(model_version=model_version)
+        if include_processed:
+            index.load_processed()
+        index.refresh_feedback()
+    return index
+
+
+def get_index(
+    include_processed: bool = True, model_version: Optional[str] = None
+) -> NearDuplicateIndex:
+    """Process-wide index, built on first use and refreshed from feedback.csv.
+
+    A full rebuild (first use, model_version change, or feedback.csv
+    rewritten) fills a new index and swaps it in at the end, so concurrent
+    queries through get_index_nowait() never see a partial index.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        current = _INDEX
+        if (
+            current is not None
+            and current.model_version == model_version
+            and current.refresh_feedback() is not None
+        ):
+            return current
+        index = _build_index(include_processed, model_version)
+        if current is not None:
+            index._stats["feedback_rebuilds"] = current._stats["feedback_rebuilds"] + 1
+        _INDEX = index
+        return index
+
+
+def get_index_nowait() -> Optional[NearDuplicateIndex]:
+    """Current index without building or refreshing it (None if not built)."""
+    return _INDEX
+
+
+def is_ready() -> bool:
+    return _INDEX is not None
+
+
+__all__ = [
+    "COPIED_VERDICT_MODEL_NAMES",
+    "NearDuplicateIndex",
+    "NearDuplicateMatch",
+    "get_index",
+    "get_index_nowait",
+    "is_ready",
+]
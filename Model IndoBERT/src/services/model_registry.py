@@ -11,24 +11,37 @@ from ..config import MODELS_DIR, SETTINGS
 
 REGISTRY_DIR = os.path.join(MODELS_DIR, "indobert_versions")
 REGISTRY_FILE = os.path.join(REGISTRY_DIR, "registry.json")
+# Per-version build outputs (onnx_export.ONNX_SUBDIR, quantize.QUANTIZED_SUBDIR)
+DERIVED_ARTIFACT_DIRS = ("onnx", "int8")
+
+
+def _default_registry() -> Dict[str, Any]:
+    return {
+        "current_version": "v1"
+        if os.path.exists(SETTINGS.indobert_model_dir)
+        else "v0",
+        "history": [],
+        "last_used_feedback_id": 0,
+    }
 
 
 def _ensure_registry() -> None:
-    os.makedirs(REGISTRY_DIR, exist_ok=True)
-    if not os.path.exists(REGISTRY_FILE):
-        data = {
-            "current_version": "v1"
-            if os.path.exists(SETTINGS.indobert_model_dir)
-            else "v0",
-            "history": [],
-            "last_used_feedback_id": 0,
-        }
-        with open(REGISTRY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    """Create registry.json once the base model exists.
+
+    While the model is missing (e.g. still downloading in the background)
+    nothing is persisted, so "v0" never sticks once the model arrives.
+    """
+    if os.path.exists(REGISTRY_FILE) or not os.path.exists(
+        SETTINGS.indobert_model_dir
+    ):
+        return
+    _write_registry(_default_registry())
 
 
 def _read_registry() -> Dict[str, Any]:
     _ensure_registry()
+    if not os.path.exists(REGISTRY_FILE):
+        return _default_registry()  # transient "v0" until the model exists
     with open(REGISTRY_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -64,13 +77,10 @@ def next_version() -> str:
     return f"v{n + 1}"
 
 
-def archive_and_set_current(
-    new_version: str,
-    metrics: Optional[Dict[str, Any]] = None,
-    feedback_rows_used: int = 0,
-) -> str:
+def archive_version(new_version: str) -> str:
     """
-    Archive the model in SETTINGS.indobert_model_dir into a versioned folder and set current version in registry.
+    Copy the model in SETTINGS.indobert_model_dir into a versioned folder without changing the registry.
+    Derived artifacts (ONNX export, INT8 build) of the previous model are left out.
     Returns the path of archived model directory.
     """
     _ensure_registry()
@@ -78,8 +88,20 @@ def archive_and_set_current(
     if os.path.exists(version_dir):
         # Should not overwrite existing version; append timestamp
         version_dir = version_dir + f"_{int(time.time())}"
-    shutil.copytree(SETTINGS.indobert_model_dir, version_dir)
+    shutil.copytree(
+        SETTINGS.indobert_model_dir,
+        version_dir,
+        ignore=shutil.ignore_patterns(*DERIVED_ARTIFACT_DIRS),
+    )
+    return version_dir
 
+
+def set_current_version(
+    new_version: str,
+    metrics: Optional[Dict[str, Any]] = None,
+    feedback_rows_used: int = 0,
+) -> None:
+    """Point the registry at new_version and append it to the history."""
     reg = _read_registry()
     reg["current_version"] = new_version
     hist = reg.get("history", [])
@@ -93,6 +115,19 @@ def archive_and_set_current(
     )
     reg["history"] = hist
     _write_registry(reg)
+
+
+def archive_and_set_current(
+    new_version: str,
+    metrics: Optional[Dict[str, Any]] = None,
+    feedback_rows_used: int = 0,
+) -> str:
+    """
+    Archive the model in SETTINGS.indobert_model_dir into a versioned folder and set current version in registry.
+    Returns the path of archived model directory.
+    """
+    version_dir = archive_version(new_version)
+    set_current_version(new_version, metrics, feedback_rows_used)
     return version_dir
 
 
@@ -101,5 +136,7 @@ __all__ = [
     "get_last_used_feedback_id",
     "set_last_used_feedback_id",
     "next_version",
+    "archive_version",
+    "set_current_version",
     "archive_and_set_current",
 ]